@@ -0,0 +1,114 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+if TYPE_CHECKING:
+    import typer
+    from typer.testing import CliRunner
+
+# The Typer/Click/rich stack and the CLI module are imported inside the
+# fixtures so that collecting or deselecting tests does not pay for them.
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the markers used by the unit tests."""
+    config.addinivalue_line(
+        "markers",
+        "deep_assert: structural command-line assertions, only run on the primary "
+        "CI leg",
+    )
+
+
+def pytest_collection_modifyitems(items: List[pytest.Item]) -> None:
+    """Skip coverage tracing for CLI tests when ``TIMELESS_TEST_NO_COVER_CLI`` is set.
+
+    pytest-cov pauses its tracer for tests carrying the ``no_cover`` marker,
+    which lets non-coverage runs avoid tracing the Typer/Click invoke path.
+    """
+    if not os.environ.get("TIMELESS_TEST_NO_COVER_CLI"):
+        return
+    for item in items:
+        if item.path.name == "test_cli.py":
+            item.add_marker(pytest.mark.no_cover)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_imports() -> None:
+    """Fixture to import the modules the CLI loads lazily once per session.
+
+    This moves their first-touch import cost out of whichever test happens
+    to run first in each worker.
+    """
+    import timeless_py.cli  # noqa: F401
+    import timeless_py.engine.restic  # noqa: F401
+    import timeless_py.manifest.apps  # noqa: F401
+    import timeless_py.manifest.brew  # noqa: F401
+    import timeless_py.manifest.mas  # noqa: F401
+    import timeless_py.manifest.replay  # noqa: F401
+    import timeless_py.retention  # noqa: F401
+
+
+@pytest.fixture(scope="module")
+def shared_tmp(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Fixture to provide a temporary directory shared by a test module.
+
+    Only use it for files a test does not mutate; tests that write files
+    whose content varies should keep the function-scoped ``tmp_path``.
+    """
+    return tmp_path_factory.mktemp("shared")
+
+
+@pytest.fixture(scope="session")
+def runner() -> CliRunner:
+    """Fixture to create a CLI runner shared across the session."""
+    from typer.testing import CliRunner
+
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def app() -> typer.Typer:
+    """Fixture to provide the TimeVault Typer application."""
+    from timeless_py.cli import app as _app
+
+    return _app
+
+
+@pytest.fixture(scope="module")
+def _restic_engine_patch() -> Generator[MagicMock, None, None]:
+    """Fixture to replace the CLI engine factory once per test module."""
+    from timeless_py.engine.restic import ResticEngine
+
+    with patch("timeless_py.cli.engine_factory") as mock_engine_class:
+        # Restrict to the attribute names rather than spec'ing the class so
+        # the mock does not re-introspect ResticEngine on construction, and
+        # use spec_set so typos in test setup fail loudly.
+        mock_engine_class.return_value = MagicMock(spec_set=dir(ResticEngine))
+        yield mock_engine_class
+
+
+@pytest.fixture
+def mock_restic_engine(
+    _restic_engine_patch: MagicMock,
+) -> Generator[MagicMock, None, None]:
+    """Fixture to mock ResticEngine, returning a clean handle for each test.
+
+    The handle is reset on setup rather than teardown so that calls made
+    through the module-wide patch by tests that never requested this
+    fixture cannot leak into the next test that does.
+    """
+    mock_engine: MagicMock = _restic_engine_patch.return_value
+    mock_engine.reset_mock(return_value=True, side_effect=True)
+    _restic_engine_patch.reset_mock()
+    # The repository opens; restic's (returncode, stderr) for `cat config`
+    mock_engine.check_access.return_value = (0, "")
+    yield mock_engine
@@ -2,30 +2,57 @@
 Tests for the config module.
 """
 
+import hashlib
 import os
 from pathlib import Path
+from typing import Callable, Dict
 from unittest.mock import patch
 
+import pytest
+
 from timeless_py.config import (
     RetentionConfig,
     TimevaultConfig,
     default_config_path,
 )
 
+ConfigLoader = Callable[[str], TimevaultConfig]
+
+
+@pytest.fixture(scope="module")
+def load_config(tmp_path_factory: pytest.TempPathFactory) -> ConfigLoader:
+    """Fixture returning a loader that parses each distinct YAML body once.
+
+    The body is written to a module-wide temporary directory and read back
+    through ``TimevaultConfig.from_file``; results are memoized by content
+    hash, so tests must treat the returned config as read-only.
+    """
+    config_dir = tmp_path_factory.mktemp("config")
+    cache: Dict[str, TimevaultConfig] = {}
 
-def test_default_config_path() -> None:
+    def _load(text: str) -> TimevaultConfig:
+        key = hashlib.sha256(text.encode()).hexdigest()
+        if key not in cache:
+            path = config_dir / f"{key}.yaml"
+            path.write_text(text)
+            cache[key] = TimevaultConfig.from_file(path)
+        return cache[key]
+
+    return _load
+
+
+def test_default_config_path(monkeypatch: pytest.MonkeyPatch) -> None:
     """default_config_path falls back to ~/.config/timevault/config.yaml."""
-    env = {"HOME": str(Path.home())}
-    with patch.dict(os.environ, env, clear=True):
-        result = default_config_path()
-        assert result == Path.home() / ".config" / "timevault" / "config.yaml"
+    monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
+    result = default_config_path()
+    assert result == Path.home() / ".config" / "timevault" / "config.yaml"
 
 
-def test_default_config_path_xdg() -> None:
+def test_default_config_path_xdg(monkeypatch: pytest.MonkeyPatch) -> None:
     """default_config_path respects $XDG_CONFIG_HOME."""
-    with patch.dict(os.environ, {"XDG_CONFIG_HOME": "/custom/config"}):
-        result = default_config_path()
-        assert result == Path("/custom/config/timevault/config.yaml")
+    monkeypatch.setenv("XDG_CONFIG_HOME", "/custom/config")
+    result = default_config_path()
+    assert result == Path("/custom/config/timevault/config.yaml")
 
 
 def test_missing_file_returns_defaults(tmp_path: Path) -> None:
@@ -38,42 +65,37 @@ def test_missing_file_returns_defaults(tmp_path: Path) -> None:
     assert cfg.retention == RetentionConfig()
 
 
-def test_empty_file_returns_defaults(tmp_path: Path) -> None:
+def test_empty_file_returns_defaults(load_config: ConfigLoader) -> None:
     """An empty YAML file returns an empty config."""
-    p = tmp_path / "config.yaml"
-    p.write_text("")
-    cfg = TimevaultConfig.from_file(p)
+    cfg = load_config("")
     assert cfg.repo is None
     assert cfg.backup_paths == []
 
 
-def test_full_config_parsing(tmp_path: Path) -> None:
-    """A fully-populated config file is parsed correctly."""
-    p = tmp_path / "config.yaml"
-    p.write_text(
-        """\
-repo: "sftp:user@host:/backups/timevault"
-mount_path: "/Volumes/TimeVault"
-backup_paths:
-  - path: "~/Documents"
-    tag: "documents"
-  - path: "~/Projects"
-    tag: "projects"
-    exclude:
-      - "*/node_modules"
-      - "*/.venv"
-exclude_patterns:
-  - "*.tmp"
-  - ".DS_Store"
-retention:
-  hourly: 12
-  daily: 5
-  weekly: 2
-  monthly: 6
-  yearly: 1
-"""
+def test_full_config_parsing() -> None:
+    """A fully-populated config is parsed correctly."""
+    cfg = TimevaultConfig.from_dict(
+        {
+            "repo": "sftp:user@host:/backups/timevault",
+            "mount_path": "/Volumes/TimeVault",
+            "backup_paths": [
+                {"path": "~/Documents", "tag": "documents"},
+                {
+                    "path": "~/Projects",
+                    "tag": "projects",
+                    "exclude": ["*/node_modules", "*/.venv"],
+                },
+            ],
+            "exclude_patterns": ["*.tmp", ".DS_Store"],
+            "retention": {
+                "hourly": 12,
+                "daily": 5,
+                "weekly": 2,
+                "monthly": 6,
+                "yearly": 1,
+            },
+        }
     )
-    cfg = TimevaultConfig.from_file(p)
     assert cfg.repo == "sftp:user@host:/backups/timevault"
     assert cfg.mount_path == "/Volumes/TimeVault"
     assert len(cfg.backup_paths) == 2
@@ -87,63 +109,39 @@ retention:
     assert cfg.retention.yearly == 1
 
 
-def test_backup_paths_with_tilde_expansion(tmp_path: Path) -> None:
+def test_backup_paths_with_tilde_expansion() -> None:
     """Paths with ~ are expanded."""
-    p = tmp_path / "config.yaml"
-    p.write_text(
-        """\
-backup_paths:
-  - path: "~/Documents"
-    tag: "docs"
-"""
+    cfg = TimevaultConfig.from_dict(
+        {"backup_paths": [{"path": "~/Documents", "tag": "docs"}]}
     )
-    cfg = TimevaultConfig.from_file(p)
     assert len(cfg.backup_paths) == 1
     assert cfg.backup_paths[0].path == Path.home() / "Documents"
 
 
-def test_backup_paths_invalid_entry_skipped(tmp_path: Path) -> None:
+def test_backup_paths_invalid_entry_skipped() -> None:
     """Entries without a 'path' key are skipped."""
-    p = tmp_path / "config.yaml"
-    p.write_text(
-        """\
-backup_paths:
-  - tag: "no-path"
-  - path: "~/valid"
-    tag: "ok"
-  - "just a string"
-"""
+    cfg = TimevaultConfig.from_dict(
+        {
+            "backup_paths": [
+                {"tag": "no-path"},
+                {"path": "~/valid", "tag": "ok"},
+                "just a string",
+            ]
+        }
     )
-    cfg = TimevaultConfig.from_file(p)
     assert len(cfg.backup_paths) == 1
     assert cfg.backup_paths[0].tag == "ok"
 
 
-def test_exclude_patterns_parsing(tmp_path: Path) -> None:
+def test_exclude_patterns_parsing() -> None:
     """Global exclude patterns are parsed as a list of strings."""
-    p = tmp_path / "config.yaml"
-    p.write_text(
-        """\
-exclude_patterns:
-  - "*.log"
-  - "*.bak"
-"""
-    )
-    cfg = TimevaultConfig.from_file(p)
+    cfg = TimevaultConfig.from_dict({"exclude_patterns": ["*.log", "*.bak"]})
     assert cfg.exclude_patterns == ["*.log", "*.bak"]
 
 
-def test_retention_partial(tmp_path: Path) -> None:
+def test_retention_partial() -> None:
     """Partial retention config leaves unset fields as None."""
-    p = tmp_path / "config.yaml"
-    p.write_text(
-        """\
-retention:
-  daily: 14
-  yearly: 5
-"""
-    )
-    cfg = TimevaultConfig.from_file(p)
+    cfg = TimevaultConfig.from_dict({"retention": {"daily": 14, "yearly": 5}})
     assert cfg.retention.hourly is None
     assert cfg.retention.daily == 14
     assert cfg.retention.weekly is None
@@ -151,15 +149,66 @@ retention:
     assert cfg.retention.yearly == 5
 
 
-def test_invalid_yaml_returns_defaults(tmp_path: Path) -> None:
+def test_invalid_yaml_returns_defaults(load_config: ConfigLoader) -> None:
     """Malformed YAML returns an empty config instead of raising."""
-    p = tmp_path / "config.yaml"
-    p.write_text(": : : [invalid yaml")
-    cfg = TimevaultConfig.from_file(p)
+    cfg = load_config(": : : [invalid yaml")
     assert cfg.repo is None
     assert cfg.backup_paths == []
 
 
+@pytest.mark.parametrize("libyaml", [True, False], ids=["c-loader", "py-loader"])
+def test_from_file_loader(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, libyaml: bool
+) -> None:
+    """from_file parses the same with or without libyaml's C loader."""
+    import yaml
+
+    if not libyaml:
+        monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+    path = tmp_path / "config.yaml"
+    path.write_text("repo: /tmp/repo\nexclude_patterns: ['*.tmp']\n")
+
+    cfg = TimevaultConfig.from_file(path)
+
+    assert cfg.repo == "/tmp/repo"
+    assert cfg.exclude_patterns == ["*.tmp"]
+
+
+def test_from_file_cached_until_modified(tmp_path: Path) -> None:
+    """An unchanged file is parsed once; editing it forces a re-parse."""
+    path = tmp_path / "config.yaml"
+    path.write_text("repo: /tmp/a\n")
+
+    first = TimevaultConfig.from_file(path)
+    assert TimevaultConfig.from_file(path) is first
+
+    # A newer timestamp invalidates the entry
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    second = TimevaultConfig.from_file(path)
+    assert second is not first
+
+    # So does a different size with the timestamp left unchanged
+    stat = path.stat()
+    path.write_text("repo: /tmp/bb\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert TimevaultConfig.from_file(path).repo == "/tmp/bb"
+
+
+@pytest.mark.parametrize("home", ["/home/user", "/home/user/", "/"])
+@pytest.mark.parametrize(
+    "value", ["~", "~/Documents", "*.tmp", "/abs/~/x", "*/node_modules/"]
+)
+def test_expand_user(monkeypatch: pytest.MonkeyPatch, home: str, value: str) -> None:
+    """Tilde expansion matches os.path.expanduser; other text is kept as is."""
+    from timeless_py.config import _expand_user
+
+    monkeypatch.setenv("HOME", home)
+    expanded = _expand_user(value, os.path.expanduser("~").rstrip(os.sep))
+
+    assert expanded == os.path.expanduser(value)
+
+
 def test_from_dict_non_dict() -> None:
     """from_dict with a non-dict value returns defaults."""
     cfg = TimevaultConfig.from_dict("not a dict")  # type: ignore[arg-type]
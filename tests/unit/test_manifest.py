@@ -1,7 +1,15 @@
+import io
 import json
+import subprocess
+import sys
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from subprocess import CompletedProcess
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 from timeless_py.engine import Snapshot
 from timeless_py.manifest.apps import generate_apps_manifest
@@ -13,94 +21,185 @@ from timeless_py.manifest.replay import (
     replay_mas_manifest,
     restore_manifests,
 )
+from timeless_py.platform import find_executable
+
+
+@pytest.fixture(autouse=True)
+def mocked_subprocess(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Fixture replacing ``subprocess.run`` and ``subprocess.Popen`` for every test.
+
+    Tests override ``run``/``popen`` return values or side effects as needed.
+    """
+    run = MagicMock(return_value=CompletedProcess(args=[], returncode=0, stdout=""))
+    popen = MagicMock()
+    monkeypatch.setattr("subprocess.run", run)
+    monkeypatch.setattr("subprocess.Popen", popen)
+    return SimpleNamespace(run=run, popen=popen)
+
+
+@pytest.fixture(autouse=True)
+def installed_tools(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fixture making every tool look installed, with a fresh ``PATH`` cache.
+
+    Tests patch ``shutil.which`` themselves to simulate missing tools.
+    """
+    monkeypatch.setattr("shutil.which", lambda name: f"/usr/bin/{name}")
+    find_executable.cache_clear()
+
+
+@pytest.fixture
+def fake_open(monkeypatch: pytest.MonkeyPatch) -> Dict[str, io.StringIO]:
+    """Fixture replacing ``open`` with in-memory buffers keyed by path."""
+    opened: Dict[str, io.StringIO] = {}
 
+    def _open(file: Any, mode: str = "r", *args: Any, **kwargs: Any) -> io.StringIO:
+        buf = io.StringIO()
+        opened[str(file)] = buf
+        return buf
 
-@patch("subprocess.run")
-def test_generate_brewfile_success(mock_run: MagicMock, tmp_path: Path) -> None:
-    mock_run.return_value = MagicMock(returncode=0, stdout="Success")
-    result = generate_brewfile(tmp_path)
-    assert result == tmp_path / "Brewfile"
-    assert mock_run.call_count == 2  # which brew + brew bundle dump
+    monkeypatch.setattr("builtins.open", _open)
+    return opened
 
 
-@patch("subprocess.run")
-def test_generate_brewfile_brew_not_found(mock_run: MagicMock, tmp_path: Path) -> None:
-    mock_run.side_effect = [FileNotFoundError, None]  # `which brew` fails
-    result = generate_brewfile(tmp_path)
+@pytest.fixture(scope="module")
+def manifest_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Fixture providing a read-only directory of empty manifest files."""
+    d = tmp_path_factory.mktemp("manifests")
+    (d / "Brewfile").touch()
+    (d / "applications.json").touch()
+    return d
+
+
+def test_generate_brewfile_success(
+    mocked_subprocess: SimpleNamespace, shared_tmp: Path
+) -> None:
+    mock_run = mocked_subprocess.run
+    mock_run.return_value = CompletedProcess(args=[], returncode=0, stdout="Success")
+    result = generate_brewfile(shared_tmp)
+    assert result == shared_tmp / "Brewfile"
+    mock_run.assert_called_once()  # brew bundle dump
+    # brew writes the Brewfile itself, so its stdout is discarded
+    assert mock_run.call_args.kwargs["stdout"] == subprocess.DEVNULL
+
+
+def test_generate_brewfile_brew_not_found(
+    mocked_subprocess: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+    shared_tmp: Path,
+) -> None:
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    result = generate_brewfile(shared_tmp)
     assert result is None
+    mocked_subprocess.run.assert_not_called()
 
 
 @patch("timeless_py.manifest.apps.sys")
-@patch("subprocess.run")
 def test_generate_apps_manifest_success(
-    mock_run: MagicMock, mock_sys: MagicMock, tmp_path: Path
+    mock_sys: MagicMock, fake_open: Dict[str, io.StringIO], shared_tmp: Path
 ) -> None:
     mock_sys.platform = "darwin"
-    mock_run.return_value = MagicMock(returncode=0)
-    with patch("builtins.open", mock_open()) as mock_file:
-        result = generate_apps_manifest(tmp_path)
-        assert result == tmp_path / "applications.json"
-        mock_file.assert_called_once_with(tmp_path / "applications.json", "w")
+    result = generate_apps_manifest(shared_tmp)
+    assert result == shared_tmp / "applications.json"
+    assert list(fake_open) == [str(shared_tmp / "applications.json")]
 
 
-@patch("subprocess.run")
-def test_generate_mas_manifest_success(mock_run: MagicMock, tmp_path: Path) -> None:
-    mock_run.return_value = MagicMock(returncode=0)
-    with patch("builtins.open", mock_open()) as mock_file:
-        result = generate_mas_manifest(tmp_path)
-        assert result == tmp_path / "mas.txt"
-        mock_file.assert_called_once_with(tmp_path / "mas.txt", "w")
+def test_generate_mas_manifest_success(
+    fake_open: Dict[str, io.StringIO], shared_tmp: Path
+) -> None:
+    result = generate_mas_manifest(shared_tmp)
+    assert result == shared_tmp / "mas.txt"
+    assert list(fake_open) == [str(shared_tmp / "mas.txt")]
 
 
 def test_find_latest_manifest_snapshot() -> None:
     mock_engine = MagicMock()
+    # Listed oldest first, as restic does
     snapshots = [
+        Snapshot("0", datetime(2023, 1, 1), "h", [], ["manifest"], {}),
         Snapshot("1", datetime(2023, 1, 2), "h", [], ["manifest"], {}),
-        Snapshot("2", datetime(2023, 1, 1), "h", [], [], {}),
+        Snapshot("2", datetime(2023, 1, 3), "h", [], [], {}),
     ]
     mock_engine.snapshots.return_value = snapshots
     result = find_latest_manifest_snapshot(mock_engine)
     assert result is not None
     assert result.id == "1"
+    mock_engine.snapshots.assert_called_once_with(tags=["manifest"])
 
 
-def test_restore_manifests_success(tmp_path: Path) -> None:
+def test_find_latest_manifest_snapshot_across_staging_paths() -> None:
+    # Every backup stages manifests in a new temporary directory, so each
+    # manifest snapshot has its own path set and all of them are listed
+    mock_engine = MagicMock()
+    mock_engine.snapshots.return_value = [
+        Snapshot(
+            snapshot_id,
+            datetime(2023, 1, day),
+            "h",
+            [f"/tmp/timevault-manifests-{suffix}/applications.json"],
+            ["manifest"],
+            {},
+        )
+        for snapshot_id, day, suffix in [("0", 1, "a1b2"), ("1", 2, "c3d4")]
+    ]
+    result = find_latest_manifest_snapshot(mock_engine)
+    assert result is not None
+    assert result.id == "1"
+
+
+def test_restore_manifests_success(manifest_dir: Path) -> None:
     mock_engine = MagicMock()
     mock_engine.restore.return_value = True
-    (tmp_path / "Brewfile").touch()
-    (tmp_path / "applications.json").touch()
-    result = restore_manifests(mock_engine, "snap1", tmp_path)
+    result = restore_manifests(mock_engine, "snap1", manifest_dir)
     assert "Brewfile" in result
     assert "applications.json" in result
+    assert "mas.txt" not in result
+
+
+def test_restore_manifests_missing_target(tmp_path: Path) -> None:
+    mock_engine = MagicMock()
+    mock_engine.restore.return_value = True
+    assert restore_manifests(mock_engine, "snap1", tmp_path / "missing") == {}
 
 
-@patch("subprocess.Popen")
-def test_replay_brewfile_success(mock_popen: MagicMock, tmp_path: Path) -> None:
-    brewfile = tmp_path / "Brewfile"
-    brewfile.touch()
-    mock_process = MagicMock()
-    mock_process.wait.return_value = 0
-    mock_process.stdout.readline.return_value = ""
-    mock_popen.return_value = mock_process
+def test_replay_brewfile_success(
+    mocked_subprocess: SimpleNamespace, manifest_dir: Path
+) -> None:
+    brewfile = manifest_dir / "Brewfile"
     assert replay_brewfile(brewfile) is True
+    # brew's output goes straight to the inherited stdout
+    mocked_subprocess.run.assert_called_once_with(
+        ["brew", "bundle", "install", f"--file={brewfile}"],
+        stderr=subprocess.STDOUT,
+        check=False,
+    )
 
 
-@patch("subprocess.run")
-def test_replay_mas_manifest_success(mock_run: MagicMock, tmp_path: Path) -> None:
-    mas_file = tmp_path / "mas.txt"
+# Output handling of `mas install`: stdout is discarded, stderr kept for errors
+_MAS_OUTPUT: Dict[str, Any] = {
+    "stdout": subprocess.DEVNULL,
+    "stderr": subprocess.PIPE,
+    "text": True,
+}
+
+
+def test_replay_mas_manifest_success(
+    mocked_subprocess: SimpleNamespace, shared_tmp: Path
+) -> None:
+    mas_file = shared_tmp / "mas.txt"
     mas_file.write_text("12345 App Name")
-    mock_run.return_value = MagicMock(returncode=0)
     assert replay_mas_manifest(mas_file) is True
-    mock_run.assert_called_with(
-        ["mas", "install", "12345"], check=True, capture_output=True, text=True
+    mocked_subprocess.run.assert_called_with(
+        ["mas", "install", "12345"], check=True, **_MAS_OUTPUT
     )
 
 
 @patch("timeless_py.manifest.apps.sys")
-@patch("timeless_py.manifest.apps.shutil.which")
-@patch("timeless_py.manifest.apps.subprocess.run")
+@patch("timeless_py.platform.shutil.which")
 def test_generate_apps_manifest_linux_dpkg(
-    mock_run: MagicMock, mock_which: MagicMock, mock_sys: MagicMock, tmp_path: Path
+    mock_which: MagicMock,
+    mock_sys: MagicMock,
+    mocked_subprocess: SimpleNamespace,
+    tmp_path: Path,
 ) -> None:
     """Test Linux manifest generation with dpkg available."""
     mock_sys.platform = "linux"
@@ -108,9 +207,9 @@ def test_generate_apps_manifest_linux_dpkg(
         "/usr/bin/dpkg-query" if cmd == "dpkg" else None
     )
 
-    mock_result = MagicMock()
-    mock_result.stdout = "vim 9.0\ncurl 7.88\n"
-    mock_run.return_value = mock_result
+    mocked_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=0, stdout="vim 9.0\ncurl 7.88\n"
+    )
 
     result = generate_apps_manifest(tmp_path)
     assert result == tmp_path / "applications.json"
@@ -120,14 +219,103 @@ def test_generate_apps_manifest_linux_dpkg(
     assert "vim 9.0" in data["dpkg"]
 
 
+def test_replay_mas_manifest_batches_installs(
+    mocked_subprocess: SimpleNamespace, tmp_path: Path
+) -> None:
+    """Test every app is installed by one mas run when it succeeds."""
+    mas_file = tmp_path / "mas.txt"
+    mas_file.write_text("111 One\nnot an app\n123abc x\n  222\tTwo (1.0)\n")
+
+    assert replay_mas_manifest(mas_file) is True
+    mocked_subprocess.run.assert_called_once_with(
+        ["mas", "install", "111", "222"], check=True, **_MAS_OUTPUT
+    )
+
+
+def test_replay_mas_manifest_reports_failed_apps(
+    mocked_subprocess: SimpleNamespace, tmp_path: Path
+) -> None:
+    """Test a failed batch retries only the apps it did not install."""
+    mas_file = tmp_path / "mas.txt"
+    mas_file.write_text("111 One\n222 Two\n333 Three\n")
+
+    def run(command: List[str], **_: Any) -> CompletedProcess[str]:
+        if command == ["mas", "list"]:
+            return CompletedProcess(command, 0, stdout="111  One  (1.0)\n")
+        if "333" in command:
+            raise subprocess.CalledProcessError(1, command, stderr="")
+        return CompletedProcess(args=command, returncode=0)
+
+    mocked_subprocess.run.side_effect = run
+
+    assert replay_mas_manifest(mas_file) is False
+    assert [call.args[0] for call in mocked_subprocess.run.call_args_list] == [
+        ["mas", "install", "111", "222", "333"],
+        ["mas", "list"],
+        ["mas", "install", "222"],
+        ["mas", "install", "333"],
+    ]
+
+
+def test_replay_mas_manifest_mas_removed(
+    mocked_subprocess: SimpleNamespace, tmp_path: Path
+) -> None:
+    """Test mas disappearing after the lookup fails the replay, not the caller."""
+    mas_file = tmp_path / "mas.txt"
+    mas_file.write_text("111 One\n222 Two\n")
+    mocked_subprocess.run.side_effect = FileNotFoundError(2, "No such file", "mas")
+
+    assert replay_mas_manifest(mas_file) is False
+    assert [call.args[0] for call in mocked_subprocess.run.call_args_list] == [
+        ["mas", "install", "111", "222"],
+        ["mas", "list"],
+    ]
+    # mas is looked up once, and the shared lookup cache is left alone
+    assert find_executable.cache_info().misses == 1
+
+
+@pytest.mark.parametrize("orjson_installed", [True, False], ids=["orjson", "stdlib"])
+@patch("timeless_py.manifest.apps.sys")
+@patch("timeless_py.platform.shutil.which")
+def test_generate_apps_manifest_linux_all_pkg_managers(
+    mock_which: MagicMock,
+    mock_sys: MagicMock,
+    mocked_subprocess: SimpleNamespace,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    orjson_installed: bool,
+) -> None:
+    """Test every available package manager is probed, keeping manifest order."""
+    if not orjson_installed:
+        # A None entry makes `import orjson` raise ImportError
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    mock_sys.platform = "linux"
+    mock_which.side_effect = lambda cmd: f"/usr/bin/{cmd}"
+    mocked_subprocess.run.side_effect = lambda cmd, **_: CompletedProcess(
+        args=cmd, returncode=0, stdout=f"{cmd[0]}-pkg 1.0\n"
+    )
+
+    assert generate_apps_manifest(tmp_path) == tmp_path / "applications.json"
+
+    data = json.loads((tmp_path / "applications.json").read_text())
+    assert data == {
+        "dpkg": ["dpkg-query-pkg 1.0"],
+        "rpm": ["rpm-pkg 1.0"],
+        "snap": ["snap-pkg 1.0"],
+        "flatpak": ["flatpak-pkg 1.0"],
+    }
+    assert list(data) == ["dpkg", "rpm", "snap", "flatpak"]
+    assert (tmp_path / "applications.json").read_text().startswith('{\n  "dpkg"')
+
+
 @patch("timeless_py.manifest.apps.sys")
-@patch("timeless_py.manifest.apps.shutil.which")
+@patch("timeless_py.platform.shutil.which")
 def test_generate_apps_manifest_linux_no_pkg_managers(
-    mock_which: MagicMock, mock_sys: MagicMock, tmp_path: Path
+    mock_which: MagicMock, mock_sys: MagicMock, shared_tmp: Path
 ) -> None:
     """Test Linux manifest returns None when no package managers found."""
     mock_sys.platform = "linux"
     mock_which.return_value = None
 
-    result = generate_apps_manifest(tmp_path)
+    result = generate_apps_manifest(shared_tmp)
     assert result is None
@@ -1,65 +1,61 @@
 """Tests for the platform helpers module."""
 
-from unittest.mock import patch
-
-from timeless_py.platform import default_mount_path, is_linux, is_macos, unmount_command
-
-
-class TestIsMacos:
-    def test_true_on_darwin(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert is_macos() is True
-
-    def test_false_on_linux(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            assert is_macos() is False
-
-
-class TestIsLinux:
-    def test_true_on_linux(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            assert is_linux() is True
-
-    def test_true_on_linux_variant(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "linux2"
-            assert is_linux() is True
-
-    def test_false_on_darwin(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert is_linux() is False
-
-
-class TestDefaultMountPath:
-    def test_macos(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert default_mount_path() == "/Volumes/TimeVault"
-
-    def test_linux(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            assert default_mount_path() == "/mnt/timevault"
-
-
-class TestUnmountCommand:
-    def test_macos(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "darwin"
-            assert unmount_command("/Volumes/TimeVault") == [
-                "umount",
-                "/Volumes/TimeVault",
-            ]
-
-    def test_linux(self) -> None:
-        with patch("timeless_py.platform.sys") as mock_sys:
-            mock_sys.platform = "linux"
-            assert unmount_command("/mnt/timevault") == [
-                "fusermount",
-                "-u",
-                "/mnt/timevault",
-            ]
+from typing import List
+
+import pytest
+
+from timeless_py.platform import (
+    default_mount_path,
+    find_executable,
+    is_linux,
+    is_macos,
+    unmount_command,
+)
+
+
+@pytest.fixture(params=["darwin", "linux", "linux2"])
+def platform_sys(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> str:
+    """Fixture to run a test once per ``sys.platform`` value."""
+    platform: str = request.param
+    monkeypatch.setattr("timeless_py.platform._IS_MACOS", platform == "darwin")
+    monkeypatch.setattr("timeless_py.platform._IS_LINUX", platform.startswith("linux"))
+    return platform
+
+
+def test_is_macos(platform_sys: str) -> None:
+    assert is_macos() is (platform_sys == "darwin")
+
+
+def test_is_linux(platform_sys: str) -> None:
+    assert is_linux() is platform_sys.startswith("linux")
+
+
+def test_default_mount_path(platform_sys: str) -> None:
+    expected = "/Volumes/TimeVault" if platform_sys == "darwin" else "/mnt/timevault"
+    assert default_mount_path() == expected
+
+
+def test_unmount_command(platform_sys: str) -> None:
+    target = default_mount_path()
+    if platform_sys == "darwin":
+        assert unmount_command(target) == ("umount", target)
+    else:
+        assert unmount_command(target) == ("fusermount", "-u", target)
+
+
+def test_find_executable_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    lookups: List[str] = []
+
+    def which(name: str) -> str:
+        lookups.append(name)
+        return f"/usr/bin/{name}"
+
+    monkeypatch.setattr("timeless_py.platform.shutil.which", which)
+    find_executable.cache_clear()
+
+    assert find_executable("mas") == "/usr/bin/mas"
+    assert find_executable("mas") == "/usr/bin/mas"
+    assert lookups == ["mas"]
+    find_executable.cache_clear()
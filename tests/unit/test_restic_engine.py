@@ -4,31 +4,79 @@ Tests for the Restic engine module.
 
 import json
 import os
+import sys
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Generator
+from subprocess import CalledProcessError, CompletedProcess, TimeoutExpired
+from typing import Any, Dict, Generator, List, Set, Tuple
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from timeless_py.engine import Snapshot
-from timeless_py.engine.restic import ResticEngine
+from timeless_py.engine.restic import ResticEngine, _json_loads, repository_missing
+from timeless_py.platform import unmount_command
 
+# Canonical restic output payloads, encoded once at import time.
+_BACKUP_SUMMARY = '{"message_type": "summary", "snapshot_id": "abc123"}'
+_SNAPSHOTS_JSON = json.dumps(
+    [
+        {
+            "id": "abc123",
+            "time": "2023-01-01T12:00:00Z",
+            "hostname": "test-host",
+            "paths": ["/home/user/docs"],
+            "tags": ["test"],
+        },
+        {
+            "id": "def456",
+            "time": "2023-01-02T12:00:00Z",
+            "hostname": "test-host",
+            "paths": ["/home/user/photos"],
+            "tags": ["backup"],
+        },
+    ]
+).encode()
 
-@pytest.fixture
-def mock_subprocess() -> Generator[MagicMock, None, None]:
-    """Fixture to mock subprocess calls."""
+
+@pytest.fixture(scope="module")
+def _subprocess_patch() -> Generator[MagicMock, None, None]:
+    """Fixture to patch the engine's subprocess module once per test module."""
     with patch("timeless_py.engine.restic.subprocess") as mock_subprocess:
-        # Configure the mock to return a successful CompletedProcess
-        mock_process = MagicMock()
-        mock_process.returncode = 0
-        mock_process.stdout = b'{"success": true}'
-        mock_subprocess.run.return_value = mock_process
         yield mock_subprocess
 
 
 @pytest.fixture
+def mock_subprocess(_subprocess_patch: MagicMock) -> MagicMock:
+    """Fixture to mock subprocess calls, reset for each test."""
+    _subprocess_patch.reset_mock(return_value=True, side_effect=True)
+    # Keep the real exception classes so the engine can still catch them
+    _subprocess_patch.CalledProcessError = CalledProcessError
+    _subprocess_patch.TimeoutExpired = TimeoutExpired
+    # Configure the mock to return a successful CompletedProcess
+    _subprocess_patch.run.return_value = CompletedProcess(
+        args=[], returncode=0, stdout=b'{"success": true}', stderr=b""
+    )
+    return _subprocess_patch
+
+
+def _popen_output(
+    mock_subprocess: MagicMock, stdout: str, returncode: int = 0
+) -> MagicMock:
+    """Configure the mocked ``subprocess.Popen`` to print *stdout* and exit."""
+    proc: MagicMock = mock_subprocess.Popen.return_value.__enter__.return_value
+    proc.stdout = iter(stdout.splitlines(keepends=True))
+    proc.wait.return_value = returncode
+    return proc
+
+
+@pytest.fixture(scope="module")
 def restic_engine() -> Generator[ResticEngine, None, None]:
-    """Fixture to create a ResticEngine instance."""
+    """Fixture to create a ResticEngine instance shared by the module.
+
+    Construction is deterministic and ``init`` only re-applies the same
+    repository and password, so sharing the instance is safe.
+    """
     with patch.dict(os.environ, {"RESTIC_PASSWORD": "test-password"}):
         engine = ResticEngine(
             repo_path=Path("/tmp/test-repo"), password="test-password"
@@ -50,205 +98,255 @@ def test_restic_engine_init(
     assert "init" in args[0]
 
 
-def test_restic_engine_backup(
-    restic_engine: ResticEngine, mock_subprocess: MagicMock
+@pytest.mark.parametrize("returncode, expected", [(0, True), (1, False)])
+def test_restic_engine_is_accessible(
+    restic_engine: ResticEngine,
+    mock_subprocess: MagicMock,
+    returncode: int,
+    expected: bool,
 ) -> None:
-    """Test backing up files."""
-    # Configure mock to return a snapshot ID
-    mock_process = MagicMock()
-    mock_process.returncode = 0
-    mock_process.stdout = '{"message_type": "summary", "snapshot_id": "abc123"}'
-    mock_subprocess.run.return_value = mock_process
+    """Test the accessibility probe reads only the repository config."""
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=returncode, stdout=b"", stderr=b""
+    )
 
-    paths = [Path("/home/user/docs"), Path("/home/user/photos")]
-    exclude_patterns = ["*.tmp", "node_modules/"]
-    tags = ["test", "backup"]
+    assert restic_engine.is_accessible() is expected
 
-    snapshot_id = restic_engine.backup(paths, exclude_patterns, tags)
+    args, _ = mock_subprocess.run.call_args
+    assert args[0][-2:] == ["cat", "config"]
+
+
+@pytest.mark.parametrize(
+    "returncode, stderr, missing",
+    [
+        (10, "Fatal: repository does not exist", True),
+        (1, "Fatal: unable to open config file: stat: no such file", True),
+        (1, "Is there a repository at the following location?", True),
+        (12, "Fatal: wrong password or no key found", False),
+        (11, "Fatal: unable to create lock in backend", False),
+        (1, "Fatal: unable to open repository: ssh: connection refused", False),
+    ],
+)
+def test_repository_missing(returncode: int, stderr: str, missing: bool) -> None:
+    """Test only restic's missing-repository failures allow an init."""
+    assert repository_missing(returncode, stderr) is missing
+
+
+def test_restic_engine_check_access(
+    restic_engine: ResticEngine, mock_subprocess: MagicMock
+) -> None:
+    """Test the probe returns restic's exit code and stderr."""
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=12, stdout="", stderr="wrong password"
+    )
 
-    assert snapshot_id == "abc123"
-    mock_subprocess.run.assert_called_once()
+    assert restic_engine.check_access(timeout=5) == (12, "wrong password")
 
-    # Check that the command includes 'backup'
     args, kwargs = mock_subprocess.run.call_args
-    assert "backup" in args[0]
+    assert args[0][-2:] == ["cat", "config"]
+    assert kwargs["timeout"] == 5
 
-    # Check that paths are included
-    for path in paths:
-        assert str(path) in args[0]
 
-    # Check that exclude patterns are included
-    for pattern in exclude_patterns:
-        assert f"--exclude={pattern}" in args[0]
+def test_restic_engine_repository_exists(tmp_path: Path) -> None:
+    """Test a filesystem repository exists once it has a config file."""
+    engine = ResticEngine(repo_path=tmp_path, password="test-password")
+    assert engine.repository_exists() is False
 
-    # Check that tags are included
-    for tag in tags:
-        assert f"--tag={tag}" in args[0]
+    (tmp_path / "config").write_text("")
+    assert engine.repository_exists() is True
 
 
-def test_restic_engine_snapshots(
+def test_restic_engine_is_accessible_timeout(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
-    """Test listing snapshots."""
-    # Sample snapshot data
-    snapshots_data = [
-        {
-            "id": "abc123",
-            "time": "2023-01-01T12:00:00Z",
-            "hostname": "test-host",
-            "paths": ["/home/user/docs"],
-            "tags": ["test"],
-        },
-        {
-            "id": "def456",
-            "time": "2023-01-02T12:00:00Z",
-            "hostname": "test-host",
-            "paths": ["/home/user/photos"],
-            "tags": ["backup"],
-        },
-    ]
-
-    # Configure mock to return snapshot data
-    mock_process = MagicMock()
-    mock_process.returncode = 0
-    mock_process.stdout = json.dumps(snapshots_data).encode()
-    mock_subprocess.run.return_value = mock_process
-
-    snapshots = restic_engine.snapshots()
-
-    assert len(snapshots) == 2
-    assert isinstance(snapshots[0], Snapshot)
-    assert snapshots[0].id == "abc123"
-    assert snapshots[1].id == "def456"
+    """Test that a probe which times out leaves accessibility unknown."""
+    mock_subprocess.run.side_effect = TimeoutExpired("restic", 5)
 
-    mock_subprocess.run.assert_called_once()
+    with pytest.raises(TimeoutExpired):
+        restic_engine.is_accessible(timeout=5)
 
-    # Check that the command includes 'snapshots'
-    args, kwargs = mock_subprocess.run.call_args
-    assert "snapshots" in args[0]
-    assert "--json" in args[0]
+    _, kwargs = mock_subprocess.run.call_args
+    assert kwargs["timeout"] == 5
 
 
-def test_restic_engine_forget(
+def test_restic_engine_backup(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
-    """Test forgetting snapshots."""
-    snapshot_ids = ["abc123", "def456"]
-
-    result = restic_engine.forget(snapshot_ids)
-
-    assert result is True
-    mock_subprocess.run.assert_called_once()
-
-    # Check that the command includes 'forget'
-    args, kwargs = mock_subprocess.run.call_args
-    assert "forget" in args[0]
+    """Test backing up files."""
+    # Configure mock to return a snapshot ID
+    _popen_output(mock_subprocess, _BACKUP_SUMMARY)
 
-    # Check that snapshot IDs are included
-    for snapshot_id in snapshot_ids:
-        assert snapshot_id in args[0]
+    paths = [Path("/home/user/docs"), Path("/home/user/photos")]
+    exclude_patterns = ["*.tmp", "node_modules/"]
+    tags = ["test", "backup"]
 
+    snapshot_id = restic_engine.backup(paths, exclude_patterns, tags)
 
-def test_restic_engine_prune(
-    restic_engine: ResticEngine, mock_subprocess: MagicMock
-) -> None:
-    """Test pruning the repository."""
-    result = restic_engine.prune()
+    assert snapshot_id == "abc123"
+    mock_subprocess.Popen.assert_called_once()
 
-    assert result is True
-    mock_subprocess.run.assert_called_once()
+    # Check that the command includes 'backup'
+    args, kwargs = mock_subprocess.Popen.call_args
+    argv = set(args[0])
+    assert "backup" in argv
 
-    # Check that the command includes 'prune'
-    args, kwargs = mock_subprocess.run.call_args
-    assert "prune" in args[0]
+    # Check that paths, exclude patterns and tags are included
+    assert {str(p) for p in paths} <= argv
+    assert {f"--exclude={p}" for p in exclude_patterns} <= argv
+    assert {f"--tag={t}" for t in tags} <= argv
 
 
-def test_restic_engine_check(
+def test_restic_engine_backup_status_lines(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
-    """Test checking the repository."""
-    result = restic_engine.check()
+    """Test the snapshot ID is found after many status lines."""
+    status = '{"message_type": "status", "percent_done": 0.5}'
+    stdout = "\n".join([status] * 1000 + ["not json", _BACKUP_SUMMARY, ""])
+    _popen_output(mock_subprocess, stdout)
 
-    assert result is True
-    mock_subprocess.run.assert_called_once()
-
-    # Check that the command includes 'check'
-    args, kwargs = mock_subprocess.run.call_args
-    assert "check" in args[0]
+    assert restic_engine.backup([Path("/home/user/docs")]) == "abc123"
 
 
-def test_restic_engine_restore(
+def test_restic_engine_backup_exclude_file(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
-    """Test restoring files."""
-    snapshot_id = "abc123"
-    paths = ["/home/user/docs/file.txt"]
-    target = Path("/tmp/restore")
+    """Test that long exclude lists are passed to restic in an exclude file."""
+    patterns = [f"*.ext{i}" for i in range(ResticEngine.EXCLUDE_FILE_THRESHOLD)]
+    # Restic would expand or skip these in a file, so they stay on the argv
+    verbatim = ["$HOME/cache", "#notes"]
+    written: List[str] = []
 
-    result = restic_engine.restore(snapshot_id, paths, target)
+    proc = _popen_output(mock_subprocess, _BACKUP_SUMMARY)
 
-    assert result is True
-    mock_subprocess.run.assert_called_once()
+    def wait() -> int:
+        argv = mock_subprocess.Popen.call_args[0][0]
+        (exclude_file,) = (a for a in argv if a.startswith("--exclude-file="))
+        written.extend(Path(exclude_file.split("=", 1)[1]).read_text().splitlines())
+        return 0
 
-    # Check that the command includes 'restore'
-    args, kwargs = mock_subprocess.run.call_args
-    assert "restore" in args[0]
-    assert snapshot_id in args[0]
+    proc.wait.side_effect = wait
 
-    # Check that paths are included
-    for path in paths:
-        assert path in args[0]
+    assert restic_engine.backup([Path("/data")], patterns + verbatim) == "abc123"
 
-    # Check that target is included
-    assert f"--target={target}" in args[0]
+    assert written == patterns
+    args, _ = mock_subprocess.Popen.call_args
+    excludes = [a for a in args[0] if a.startswith("--exclude=")]
+    assert excludes == [f"--exclude={p}" for p in verbatim]
+    exclude_file = next(a for a in args[0] if a.startswith("--exclude-file="))
+    assert not Path(exclude_file.split("=", 1)[1]).exists()
 
 
-def test_restic_engine_mount(
-    restic_engine: ResticEngine, mock_subprocess: MagicMock
+@pytest.mark.parametrize("orjson_installed", [True, False], ids=["orjson", "stdlib"])
+def test_restic_engine_snapshots(
+    restic_engine: ResticEngine,
+    mock_subprocess: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+    orjson_installed: bool,
 ) -> None:
-    """Test mounting the repository."""
-    target = Path("/tmp/mount")
+    """Test listing snapshots."""
+    if not orjson_installed:
+        # A None entry makes `import orjson` raise ImportError
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    _json_loads.cache_clear()
+    # Configure mock to return snapshot data
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=0, stdout=_SNAPSHOTS_JSON, stderr=b""
+    )
 
-    # Configure mock to simulate a running process for mount
-    mock_subprocess.run.return_value.returncode = 0
+    snapshots = restic_engine.snapshots()
 
-    result = restic_engine.mount(target)
+    assert len(snapshots) == 2
+    assert isinstance(snapshots[0], Snapshot)
+    assert snapshots[0].id == "abc123"
+    assert snapshots[1].id == "def456"
+    assert snapshots[0].time == datetime(2023, 1, 1, 12, tzinfo=timezone.utc)
 
-    assert result is True
     mock_subprocess.run.assert_called_once()
 
-    # Check that the command includes 'mount'
+    # Check that the command includes 'snapshots'
     args, kwargs = mock_subprocess.run.call_args
-    assert "mount" in args[0]
-    assert str(target) in args[0]
+    assert {"snapshots", "--json"} <= set(args[0])
 
 
-def test_restic_engine_unmount(
+def test_restic_engine_snapshots_filters(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
-    """Test unmounting the repository."""
-    target = Path("/tmp/mount")
-
-    # Configure mock for successful unmount
-    mock_subprocess.run.return_value.returncode = 0
-
-    result = restic_engine.unmount(target)
+    """Test the tag filter is passed on to restic."""
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=0, stdout=b"[]", stderr=b""
+    )
+
+    assert restic_engine.snapshots(tags=["manifest", "host"]) == []
+
+    argv = mock_subprocess.run.call_args[0][0]
+    assert argv[1:] == ["snapshots", "--json", "--tag=manifest,host"]
+
+
+_MOUNT_TARGET = Path("/tmp/mount")
+_RESTORE_TARGET = Path("/tmp/restore")
+
+
+@pytest.mark.deep_assert
+@pytest.mark.parametrize(
+    "method, args, expected_tokens",
+    [
+        ("forget", (["abc123", "def456"],), {"forget", "abc123", "def456"}),
+        ("prune", (), {"prune"}),
+        ("check", (), {"check"}),
+        (
+            "restore",
+            ("abc123", ["/home/user/docs/file.txt"], _RESTORE_TARGET),
+            {
+                "restore",
+                "abc123",
+                "/home/user/docs/file.txt",
+                f"--target={_RESTORE_TARGET}",
+            },
+        ),
+        ("mount", (_MOUNT_TARGET,), {"mount", str(_MOUNT_TARGET)}),
+        (
+            "unmount",
+            (_MOUNT_TARGET,),
+            set(unmount_command(str(_MOUNT_TARGET))),
+        ),
+    ],
+)
+def test_restic_engine_commands(
+    restic_engine: ResticEngine,
+    mock_subprocess: MagicMock,
+    method: str,
+    args: Tuple[Any, ...],
+    expected_tokens: Set[str],
+) -> None:
+    """Test that each repository command succeeds and builds the right argv."""
+    result = getattr(restic_engine, method)(*args)
 
     assert result is True
     mock_subprocess.run.assert_called_once()
 
-    # Check that the command is correct for unmounting
-    args, kwargs = mock_subprocess.run.call_args
-    assert "umount" in args[0] or "fusermount" in args[0]
-    assert str(target) in args[0]
+    argv = mock_subprocess.run.call_args[0][0]
+    assert expected_tokens <= set(argv)
+
+
+def test_restic_engine_forget_batches_and_prunes(
+    restic_engine: ResticEngine,
+    mock_subprocess: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test forget splits IDs into batches and prunes in the last call only."""
+    monkeypatch.setattr(ResticEngine, "FORGET_BATCH_SIZE", 2)
+
+    assert restic_engine.forget(["a", "b", "c"], prune=True) is True
 
+    argvs = [call.args[0][1:] for call in mock_subprocess.run.call_args_list]
+    assert argvs == [["forget", "a", "b"], ["forget", "c", "--prune"]]
 
+
+@pytest.mark.deep_assert
 def test_restic_engine_unmount_macos(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
     """Test unmount uses umount on macOS."""
-    mock_subprocess.run.return_value.returncode = 0
-
     with patch(
         "timeless_py.engine.restic.unmount_command",
         return_value=["umount", "/Volumes/Timeless"],
@@ -260,12 +358,11 @@ def test_restic_engine_unmount_macos(
     assert args[0] == ["umount", "/Volumes/Timeless"]
 
 
+@pytest.mark.deep_assert
 def test_restic_engine_unmount_linux(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
     """Test unmount uses fusermount -u on Linux."""
-    mock_subprocess.run.return_value.returncode = 0
-
     with patch(
         "timeless_py.engine.restic.unmount_command",
         return_value=["fusermount", "-u", "/mnt/timeless"],
@@ -277,13 +374,85 @@ def test_restic_engine_unmount_linux(
     assert args[0] == ["fusermount", "-u", "/mnt/timeless"]
 
 
+def test_restic_engine_env_cached() -> None:
+    """Test the environment is reused until the repository or password changes."""
+    engine = ResticEngine(repo_path=Path("/tmp/test-repo"), password="one")
+
+    env = engine._get_env()
+    assert engine._get_env() is env
+    assert env["RESTIC_REPOSITORY"] == "/tmp/test-repo"
+
+    engine.password = "two"
+    assert engine._get_env()["RESTIC_PASSWORD"] == "two"
+
+    engine.password = None
+    engine.password_file = Path("/tmp/pw")
+    env = engine._get_env()
+    assert env["RESTIC_PASSWORD_FILE"] == "/tmp/pw"
+    assert env.get("RESTIC_PASSWORD") != "two"
+
+
+def test_restic_engine_env_passthrough() -> None:
+    """Test only the variables restic reads are passed on from the environment."""
+    environ = {
+        "PATH": "/usr/bin",
+        "AWS_ACCESS_KEY_ID": "key",
+        "RESTIC_CACHE_DIR": "/cache",
+        "https_proxy": "http://proxy",
+        "UNRELATED_SECRET": "x",
+    }
+    with patch.dict(os.environ, environ, clear=True):
+        env = ResticEngine(Path("/tmp/test-repo"), password="pw")._get_env()
+
+    assert env == {
+        "PATH": "/usr/bin",
+        "AWS_ACCESS_KEY_ID": "key",
+        "RESTIC_CACHE_DIR": "/cache",
+        "https_proxy": "http://proxy",
+        "RESTIC_REPOSITORY": "/tmp/test-repo",
+        "RESTIC_PASSWORD": "pw",
+    }
+
+
+@pytest.mark.parametrize(
+    "environ",
+    [
+        # Custom CA for an S3, REST server or MinIO backend
+        {"SSL_CERT_FILE": "/etc/ca.pem", "SSL_CERT_DIR": "/etc/certs"},
+        # RESTIC_PASSWORD_COMMAND running pass/gpg or secret-tool
+        {
+            "RESTIC_PASSWORD_COMMAND": "pass show backup",
+            "GNUPGHOME": "/home/user/.gnupg",
+            "GPG_TTY": "/dev/pts/0",
+            "PASSWORD_STORE_DIR": "/home/user/.password-store",
+            "DISPLAY": ":0",
+            "DBUS_SESSION_BUS_ADDRESS": "unix:path=/run/user/1000/bus",
+        },
+        # GSSAPI-authenticated sftp
+        {"KRB5CCNAME": "FILE:/tmp/krb5cc_1000"},
+    ],
+    ids=["tls", "password-command", "kerberos"],
+)
+def test_restic_engine_env_passthrough_helpers(environ: Dict[str, str]) -> None:
+    """Test the variables TLS, password commands and Kerberos rely on are kept."""
+    with patch.dict(os.environ, environ, clear=True):
+        env = ResticEngine(Path("/tmp/test-repo"), password_file=Path("/pw"))._get_env()
+
+    assert env == {
+        **environ,
+        "RESTIC_REPOSITORY": "/tmp/test-repo",
+        "RESTIC_PASSWORD_FILE": "/pw",
+    }
+
+
 def test_restic_engine_run_command_error(
     restic_engine: ResticEngine, mock_subprocess: MagicMock
 ) -> None:
     """Test error handling in the engine."""
     # Configure mock to simulate a failed command
-    mock_subprocess.run.return_value.returncode = 1
-    mock_subprocess.run.return_value.stderr = b"Error: repository not found"
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=1, stdout=b"", stderr=b"Error: repository not found"
+    )
 
     result = restic_engine.init(Path("/tmp/test-repo"), "test-password")
 
@@ -4,8 +4,10 @@ Tests for the retention policy module.
 
 import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict
 
-from hypothesis import given
+import pytest
+from hypothesis import given, settings
 from hypothesis import strategies as st
 
 from timeless_py.engine import Snapshot
@@ -25,119 +27,110 @@ def test_retention_policy_default() -> None:
     assert policy.exclude_patterns == []
 
 
-def test_retention_policy_from_dict() -> None:
-    """Test creating retention policy from dictionary."""
-    policy_dict = {
-        "hourly": 12,
-        "daily": 14,
-        "weekly": 8,
-        "monthly": 6,
-        "yearly": 2,
-        "exclude_patterns": ["*.tmp", "node_modules/"],
-    }
-
-    policy = RetentionPolicy.from_dict(policy_dict)
-
-    assert policy.hourly == 12
-    assert policy.daily == 14
-    assert policy.weekly == 8
-    assert policy.monthly == 6
-    assert policy.yearly == 2
-    assert policy.exclude_patterns == ["*.tmp", "node_modules/"]
-
-
-def test_retention_policy_from_yaml(tmp_path: Path) -> None:
-    """Test creating retention policy from YAML file."""
-    yaml_content = """
-    hourly: 12
-    daily: 14
-    weekly: 8
-    monthly: 6
-    yearly: 2
-    exclude_patterns:
-      - "*.tmp"
-      - "node_modules/"
-    """
+_EXPECTED_POLICY = RetentionPolicy(
+    hourly=12,
+    daily=14,
+    weekly=8,
+    monthly=6,
+    yearly=2,
+    exclude_patterns=["*.tmp", "node_modules/"],
+)
+
+_POLICY_YAML_BYTES = b"""\
+hourly: 12
+daily: 14
+weekly: 8
+monthly: 6
+yearly: 2
+exclude_patterns:
+  - "*.tmp"
+  - "node_modules/"
+"""
+
+
+def _policy_from_dict(tmp_path: Path) -> RetentionPolicy:
+    return RetentionPolicy.from_dict(
+        {
+            "hourly": 12,
+            "daily": 14,
+            "weekly": 8,
+            "monthly": 6,
+            "yearly": 2,
+            "exclude_patterns": ["*.tmp", "node_modules/"],
+        }
+    )
+
 
+def _policy_from_yaml(tmp_path: Path) -> RetentionPolicy:
     yaml_file = tmp_path / "policy.yaml"
-    yaml_file.write_text(yaml_content)
+    yaml_file.write_bytes(_POLICY_YAML_BYTES)
+    return RetentionPolicy.from_file(str(yaml_file))
+
+
+@pytest.mark.parametrize(
+    "loader", [_policy_from_dict, _policy_from_yaml], ids=["dict", "yaml"]
+)
+def test_retention_policy_loading(
+    loader: Callable[[Path], RetentionPolicy], tmp_path: Path
+) -> None:
+    """Test creating retention policy from a dictionary and from a YAML file."""
+    assert loader(tmp_path) == _EXPECTED_POLICY
+
+
+@pytest.mark.parametrize("libyaml", [True, False], ids=["libyaml", "pure"])
+def test_retention_policy_yaml_libyaml(
+    monkeypatch: pytest.MonkeyPatch, libyaml: bool
+) -> None:
+    """Test YAML loading and dumping match with or without libyaml."""
+    import yaml
 
-    policy = RetentionPolicy.from_file(str(yaml_file))
+    if not libyaml:
+        monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+        monkeypatch.delattr(yaml, "CSafeDumper", raising=False)
 
-    assert policy.hourly == 12
-    assert policy.daily == 14
-    assert policy.weekly == 8
-    assert policy.monthly == 6
-    assert policy.yearly == 2
-    assert policy.exclude_patterns == ["*.tmp", "node_modules/"]
+    policy = RetentionPolicy.from_yaml(_POLICY_YAML_BYTES.decode())
+
+    assert policy == _EXPECTED_POLICY
+    assert policy.to_yaml() == yaml.dump(
+        policy.to_dict(), Dumper=yaml.SafeDumper, default_flow_style=False
+    )
+
+
+# Snapshot ids and ages for the evaluator test: hourly for 48 hours, daily for
+# 14 days, weekly for 8 weeks, monthly for 12 months and yearly for 5 years.
+# The evaluator only compares snapshot times with each other, so one
+# reference time taken at import is enough.
+_NOW = datetime.datetime.now(datetime.timezone.utc)
+_SNAPSHOT_AGES = tuple(
+    (f"{prefix}-{i}", step * i)
+    for prefix, step, count in (
+        ("hourly", datetime.timedelta(hours=1), 48),
+        ("daily", datetime.timedelta(days=1), 14),
+        ("weekly", datetime.timedelta(weeks=1), 8),
+        ("monthly", datetime.timedelta(days=30), 12),
+        ("yearly", datetime.timedelta(days=365), 5),
+    )
+    for i in range(1, count + 1)
+)
 
 
 def test_retention_evaluator_basic() -> None:
     """Test basic retention evaluation."""
-    now = datetime.datetime.now(datetime.timezone.utc)
-
-    # Create snapshots at different times
+    # Create snapshots at different times, sharing one paths/tags/metadata
+    # object across all of them since the evaluator never mutates them
+    paths = ["/home/user"]
+    tags = ["test"]
+    metadata: Dict[str, Any] = {}
     snapshots = [
-        # Hourly snapshots for the last 48 hours
-        *[
-            Snapshot(
-                id=f"hourly-{i}",
-                time=now - datetime.timedelta(hours=i),
-                hostname="test-host",
-                paths=["/home/user"],
-                tags=["test"],
-                metadata={},
-            )
-            for i in range(1, 49)
-        ],
-        # Daily snapshots for the last 14 days
-        *[
-            Snapshot(
-                id=f"daily-{i}",
-                time=now - datetime.timedelta(days=i),
-                hostname="test-host",
-                paths=["/home/user"],
-                tags=["test"],
-                metadata={},
-            )
-            for i in range(1, 15)
-        ],
-        # Weekly snapshots for the last 8 weeks
-        *[
-            Snapshot(
-                id=f"weekly-{i}",
-                time=now - datetime.timedelta(weeks=i),
-                hostname="test-host",
-                paths=["/home/user"],
-                tags=["test"],
-                metadata={},
-            )
-            for i in range(1, 9)
-        ],
-        # Monthly snapshots for the last 12 months
-        *[
-            Snapshot(
-                id=f"monthly-{i}",
-                time=now - datetime.timedelta(days=i * 30),
-                hostname="test-host",
-                paths=["/home/user"],
-                tags=["test"],
-                metadata={},
-            )
-            for i in range(1, 13)
-        ],
-        # Yearly snapshots for the last 5 years
-        *[
-            Snapshot(
-                id=f"yearly-{i}",
-                time=now - datetime.timedelta(days=i * 365),
-                hostname="test-host",
-                paths=["/home/user"],
-                tags=["test"],
-                metadata={},
-            )
-            for i in range(1, 6)
-        ],
+        Snapshot(
+            id=snapshot_id,
+            time=_NOW - age,
+            hostname="test-host",
+            paths=paths,
+            tags=tags,
+            metadata=metadata,
+        )
+        for snapshot_id, age in _SNAPSHOT_AGES
     ]
 
     # Create policy
@@ -152,16 +145,37 @@ def test_retention_evaluator_basic() -> None:
         len(to_keep) == 24 + 7 + 4 + 6 + 3
     )  # hourly + daily + weekly + monthly + yearly
 
-    # Check that we're forgetting the rest
+    # Check that we're forgetting the rest, newest first
     assert len(to_forget) == len(snapshots) - len(to_keep)
+    assert to_keep.isdisjoint(to_forget)
+    times = {snap.id: snap.time for snap in snapshots}
+    assert to_forget == sorted(to_forget, key=times.__getitem__, reverse=True)
+
+
+def test_retention_evaluator_keep_nothing() -> None:
+    """Test a policy with every limit at zero forgets all snapshots."""
+    snapshots = [
+        Snapshot(str(hours), _NOW - datetime.timedelta(hours=hours), "h", [], [], {})
+        for hours in range(3)
+    ]
+    policy = RetentionPolicy(hourly=0, daily=0, weekly=0, monthly=0, yearly=0)
+
+    assert RetentionEvaluator(policy).evaluate(snapshots) == (set(), ["0", "1", "2"])
+
+
+def test_snapshot_uses_slots() -> None:
+    """Snapshot stays slotted, since the evaluator builds and scans many of them."""
+    assert hasattr(Snapshot, "__slots__")
+    assert not hasattr(Snapshot("id", _NOW, "host", [], [], {}), "__dict__")
 
 
+@settings(max_examples=25, deadline=None)
 @given(
-    hourly=st.integers(min_value=0, max_value=100),
-    daily=st.integers(min_value=0, max_value=100),
-    weekly=st.integers(min_value=0, max_value=100),
-    monthly=st.integers(min_value=0, max_value=100),
-    yearly=st.integers(min_value=0, max_value=100),
+    hourly=st.integers(min_value=0, max_value=10),
+    daily=st.integers(min_value=0, max_value=10),
+    weekly=st.integers(min_value=0, max_value=10),
+    monthly=st.integers(min_value=0, max_value=10),
+    yearly=st.integers(min_value=0, max_value=10),
 )
 def test_retention_policy_property_based(
     hourly: int, daily: int, weekly: int, monthly: int, yearly: int
@@ -4,6 +4,10 @@ TimeVault - Time Machine-style personal backup orchestrated by Python & uv.
 Snapshot what matters, remember how to rebuild the rest.
 """
 
-from importlib.metadata import version as _version
+try:
+    # Generated by the hatch version build hook.
+    from ._version import __version__ as __version__
+except ImportError:  # pragma: no cover - source tree without a build
+    from importlib.metadata import version as _version
 
-__version__ = _version("timevault")
+    __version__ = _version("timevault")
@@ -0,0 +1,39 @@
+"""
+Entry point for the ``timevault`` command and ``python -m timeless_py``.
+
+Printing the version is answered here, before Typer, Click and Rich are
+imported; everything else is handed to the Typer app.
+"""
+
+import faulthandler
+import sys
+from typing import List, Optional
+
+# Argument lists that only ask for the version
+_VERSION_ARGS = (["version"], ["--version"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the CLI with *argv*, defaulting to ``sys.argv[1:]``."""
+    args = sys.argv[1:] if argv is None else argv
+    if args in _VERSION_ARGS:
+        from timeless_py import __version__
+
+        print(f"timevault version: {__version__}")
+        return
+
+    # Dump Python tracebacks if a long backup or mount crashes in native code.
+    # Needs a real stderr file descriptor, which embedding callers may lack:
+    # pythonw and some daemon launchers leave sys.stderr as None.
+    try:
+        faulthandler.enable()
+    except (AttributeError, RuntimeError, ValueError):
+        pass
+
+    from timeless_py.cli import app
+
+    app(args=args, prog_name="timevault")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,46 +5,135 @@ This module provides the command-line entry point for the TimeVault backup
 application.
 """
 
+import functools
 import json
 import logging
 import os
+import signal
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
-from typing import Annotated, List, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NoReturn,
+    Optional,
+    Set,
+    Tuple,
+)
 
-import keyring
 import typer
-from rich.console import Console
-from rich.logging import RichHandler
 
 from timeless_py import __version__
 from timeless_py.config import TimevaultConfig
-from timeless_py.engine.restic import ResticEngine
-from timeless_py.manifest.apps import generate_apps_manifest
-from timeless_py.manifest.brew import generate_brewfile
-from timeless_py.manifest.mas import generate_mas_manifest
-from timeless_py.manifest.replay import (
-    find_latest_manifest_snapshot,
-    replay_brewfile,
-    replay_mas_manifest,
-    restore_manifests,
-)
 from timeless_py.platform import default_mount_path, is_macos
-from timeless_py.retention import RetentionEvaluator, RetentionPolicy
-
-# Set up the console and logger
-console = Console()
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[RichHandler(console=console, rich_tracebacks=True)],
-)
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from timeless_py.engine.restic import ResticEngine
+    from timeless_py.retention import RetentionPolicy
+
+# keyring, the restic engine, the retention and the manifest modules are
+# imported inside the commands that use them, so `--help` and `version` do
+# not pay for them.
+
+# Set up the logger. The root log handler is installed by the app callback
+# once the output format is known.
 logger = logging.getLogger("timevault")
 
+# Rich console, created on first use by get_console. Building it probes the
+# terminal, which `--version` and JSON runs that print nothing never need.
+_console: Optional["Console"] = None
+# Whether the console writes to stderr, keeping stdout for JSON log records
+_console_stderr = False
+
+
+def get_console() -> "Console":
+    """Return the Rich console, creating it on first call."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console(stderr=_console_stderr)
+    return _console
+
+
+_RICH_FORMATTER = logging.Formatter("%(message)s", datefmt="[%X]")
+_JSON_FORMATTER = logging.Formatter(
+    '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s"}',
+    datefmt="%Y-%m-%dT%H:%M:%S",
+)
+
+# Root handler installed by configure_logging and whether it writes JSON
+_log_handler: Optional[logging.Handler] = None
+_log_json = False
+
+
+def configure_logging(json_output: bool = False, verbose: bool = False) -> None:
+    """Install the single root log handler for JSON or Rich console output.
+
+    In JSON mode the console is switched to stderr so stdout carries only
+    JSON records. Calling again with the same format keeps the installed
+    handler and only updates its level.
+    """
+    global _log_handler, _log_json, _console, _console_stderr
+    level = logging.DEBUG if verbose else logging.INFO
+    if (
+        _log_handler is not None
+        and _log_json == json_output
+        # A JSON handler holds the stdout it was created with
+        and getattr(_log_handler, "stream", sys.stdout) is sys.stdout
+    ):
+        _log_handler.setLevel(level)
+        return
+
+    if _console_stderr != json_output:
+        _console_stderr = json_output
+        _console = None
+
+    handler: logging.Handler
+    if json_output:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_JSON_FORMATTER)
+    else:
+        from rich.logging import RichHandler
+
+        handler = RichHandler(console=get_console(), rich_tracebacks=True)
+        handler.setFormatter(_RICH_FORMATTER)
+    handler.setLevel(level)
+
+    root = logging.getLogger()
+    if _log_handler is not None:
+        root.removeHandler(_log_handler)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    _log_handler = handler
+    _log_json = json_output
+
+
 # Keyring integration uses account names as service names
 
+
+def _restic_engine(*args: Any, **kwargs: Any) -> "ResticEngine":
+    """Construct a ResticEngine, importing the engine module on first use."""
+    from timeless_py.engine.restic import ResticEngine
+
+    return ResticEngine(*args, **kwargs)
+
+
+# Factory used to construct the engine for each repository target. Tests
+# substitute their own callable here instead of patching ResticEngine.
+engine_factory: Callable[..., "ResticEngine"] = _restic_engine
+
 # Lazy-loaded configuration
 _config: Optional[TimevaultConfig] = None
 
@@ -57,6 +146,118 @@ def get_config() -> TimevaultConfig:
     return _config
 
 
+# Keyring entries already read in this process, by service name. Each lookup
+# can be a slow round-trip to the system keychain.
+_keyring_cache: Dict[str, Optional[str]] = {}
+
+
+def get_keyring_password(service: str) -> Optional[str]:
+    """Return the keyring entry stored for *service*, caching it on first call."""
+    if service not in _keyring_cache:
+        import keyring
+
+        _keyring_cache[service] = keyring.get_password(service, "timevault")
+    return _keyring_cache[service]
+
+
+def get_keyring_credentials() -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return the (repo, password) pair stored in the keyring.
+
+    ``init`` stores both in a single JSON ``TIMELESS`` entry so that one
+    keychain read returns them. The separate ``TIMELESS_REPO`` and
+    ``TIMELESS_PASSWORD`` entries written by older versions are read when
+    that entry is missing or malformed.
+    """
+    stored = get_keyring_password("TIMELESS")
+    if stored:
+        try:
+            data = json.loads(stored)
+            return data.get("repo"), data.get("password")
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.debug(f"Ignoring malformed keyring credentials: {e}")
+    return (
+        get_keyring_password("TIMELESS_REPO"),
+        get_keyring_password("TIMELESS_PASSWORD"),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _load_policy_cached(path: str, mtime_ns: int, size: int) -> "RetentionPolicy":
+    """Parse the policy file at *path*; *mtime_ns* and *size* only key the cache."""
+    from timeless_py.retention import RetentionPolicy
+
+    return RetentionPolicy.from_file(path)
+
+
+def load_retention_policy(policy_file: str) -> "RetentionPolicy":
+    """
+    Load a retention policy file, reusing the parsed policy while it is unchanged.
+
+    The returned policy may be shared between calls and must not be mutated.
+    """
+    from timeless_py.retention import RetentionPolicy
+
+    try:
+        stat = os.stat(policy_file)
+    except OSError:
+        # Let from_file report the unreadable file and fall back to defaults
+        return RetentionPolicy.from_file(policy_file)
+    # The size catches edits within the mtime granularity of coarse filesystems
+    return _load_policy_cached(policy_file, stat.st_mtime_ns, stat.st_size)
+
+
+def _json_dumps() -> Callable[[Any], str]:
+    """
+    Return a compact JSON serializer, using orjson when it is installed.
+
+    orjson is optional (the ``fast`` extra). Both serializers write
+    datetimes in ISO 8601 form.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return functools.partial(
+            json.dumps, separators=(",", ":"), default=datetime.isoformat
+        )
+    return lambda obj: orjson.dumps(obj).decode()
+
+
+# Seconds to wait for a repository target's accessibility probe before
+# passing it over, while another target is still an alternative
+REPO_PROBE_TIMEOUT = 5.0
+
+# Repository options shared by every command that opens a repository
+RepoOption = Annotated[
+    Optional[str],
+    typer.Option(
+        "--repo",
+        "-r",
+        help="Path to the repository, or a semicolon-separated list of targets. "
+        "Targets are checked together but preferred in the order given. While "
+        "another target is available, one that does not answer within "
+        f"{REPO_PROBE_TIMEOUT:g}s is passed over; it is waited on for as long "
+        "as it takes if no other target can be opened, and always before any "
+        "target is initialized. "
+        "Uses TIMELESS_REPO env var if not specified.",
+    ),
+]
+PasswordOption = Annotated[
+    Optional[str],
+    typer.Option(
+        "--password",
+        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
+    ),
+]
+PasswordFileOption = Annotated[
+    Optional[str],
+    typer.Option(
+        "--password-file",
+        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
+    ),
+]
+
+
 # Create the Typer app
 app = typer.Typer(
     help="Time Machine-style personal backup orchestrated by Python & uv.",
@@ -64,6 +265,15 @@ app = typer.Typer(
 )
 
 
+def _split_repo_paths(value: str) -> List[str]:
+    """Split a semicolon-separated repository setting into non-empty targets."""
+    if ";" not in value:
+        # Common single-target case: skip the split and the filtering pass
+        target = value.strip()
+        return [target] if target else []
+    return [p for p in (part.strip() for part in value.split(";")) if p]
+
+
 def get_repo_credentials(
     repo: Optional[str],
     password: Optional[str],
@@ -91,47 +301,113 @@ def get_repo_credentials(
             repo_path = config.repo
             logger.debug("Loaded repository path from config file.")
 
-    if not repo_path:
-        # Fetch from keyring using keychain name as service and account as "timevault"
+    need_pwd = not pwd and not pwd_file
+    if not repo_path or need_pwd:
+        # Fetch whichever values are still missing from the keyring
         try:
-            repo_path = keyring.get_password("TIMELESS_REPO", "timevault")
-            if repo_path:
-                logger.debug("Loaded repository path from keyring.")
+            stored_repo, stored_pwd = get_keyring_credentials()
         except Exception as e:
-            logger.debug(f"Failed to load repository path from keyring: {e}")
-
-    if not pwd and not pwd_file:
-        try:
-            pwd = keyring.get_password("TIMELESS_PASSWORD", "timevault")
-            if pwd:
+            logger.debug(f"Failed to load credentials from keyring: {e}")
+        else:
+            if not repo_path and stored_repo:
+                repo_path = stored_repo
+                logger.debug("Loaded repository path from keyring.")
+            if need_pwd and stored_pwd:
+                pwd = stored_pwd
                 logger.debug("Loaded password from keyring.")
-        except Exception as e:
-            logger.debug(f"Failed to load password from keyring: {e}")
 
-    # Split repo_path by semicolons if it exists
-    repo_paths = []
-    if repo_path:
-        repo_paths = [path.strip() for path in repo_path.split(";") if path.strip()]
-        if len(repo_paths) > 1:
-            logger.debug(f"Found {len(repo_paths)} repository targets")
+    repo_paths = _split_repo_paths(repo_path) if repo_path else []
+    if len(repo_paths) > 1:
+        logger.debug(f"Found {len(repo_paths)} repository targets")
 
     return repo_paths, pwd, pwd_file
 
 
-def log_error(message: str) -> None:
-    """Log an error message to both logger and console."""
+_MISSING_REPO_MSG = (
+    "Repository path not specified. "
+    "Use --repo, set TIMELESS_REPO env var, or run init first."
+)
+_MISSING_PASSWORD_MSG = (
+    "Password not specified. "
+    "Use --password, --password-file, set env vars, or run init first."
+)
+_MISSING_INIT_PASSWORD_MSG = (
+    "A password must be provided via --password or TIMELESS_PASSWORD for init."
+)
+_NO_ACCESSIBLE_REPO_MSG = "No accessible repositories found"
+
+
+def fatal(message: str, code: int = 1) -> NoReturn:
+    """Report an error once on stderr and in the log, then exit with ``code``."""
+    typer.echo(message, err=True, color=True)
     logger.error(message)
-    console.print(f"[red]{message}[/red]")
-    return None
+    raise typer.Exit(code)
+
+
+def _make_engine(
+    repo_dir: Path, pwd: Optional[str], pwd_file_path: Optional[Path]
+) -> "ResticEngine":
+    """Create an engine for one repository target.
+
+    Engines are not cached: ``ResticEngine.init`` rebinds the repository and
+    password on the instance, so one must not be shared between lookups.
+    """
+    return engine_factory(repo_path=repo_dir, password=pwd, password_file=pwd_file_path)
+
+
+def _start_probe(engine: "ResticEngine") -> "Future[Tuple[int, str]]":
+    """Probe the repository of ``engine`` on a daemon thread.
+
+    The future holds restic's exit code and stderr. The probe itself has no
+    time limit; callers bound how long they wait for it. Being a daemon, a
+    probe still running once a target has been chosen never holds up
+    interpreter exit; it only reads the repository config and takes no lock.
+    """
+    future: "Future[Tuple[int, str]]" = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(engine.check_access())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _unopened_error(repo_path: str, returncode: int, stderr: str) -> Optional[str]:
+    """Log why ``repo_path`` could not be opened.
+
+    Returns None when there is no repository there, so one may be initialized,
+    and the error otherwise.
+    """
+    from timeless_py.engine.restic import repository_missing
+
+    if repository_missing(returncode, stderr):
+        logger.info(f"Repository does not exist at {repo_path}")
+        return None
+    error = stderr.strip() or f"restic exited with code {returncode}"
+    logger.warning(f"Repository {repo_path} is not accessible: {error}")
+    return error
 
 
 def find_accessible_repo(
     repo_paths: List[str], pwd: Optional[str], pwd_file: Optional[str]
-) -> Optional[Tuple[str, ResticEngine]]:
+) -> Optional[Tuple[str, "ResticEngine"]]:
     """
     Find the first accessible repository from a list of repository paths.
 
-    If a repository does not exist, it will be automatically initialized.
+    All targets are probed concurrently, but an earlier target that can be
+    opened is always preferred over a later one. When there is more than one
+    target, a target that has not answered within REPO_PROBE_TIMEOUT is
+    passed over for now, neither used nor treated as inaccessible; if no
+    other target can be opened, its probe is waited on to the end. Probes
+    of later targets may still be running after an earlier target has been
+    chosen; they are left to finish in the background. Only once every
+    probe has answered are the targets where restic found no repository
+    tried in order, and a repository is automatically initialized there. A target that exists but
+    cannot be opened, for example because of a wrong password, a lock or a
+    network error, is never initialized; its error is reported instead.
 
     Args:
         repo_paths: List of repository paths to try
@@ -146,48 +422,76 @@ def find_accessible_repo(
         return None
 
     last_error: Optional[Exception] = None
+    engines: Dict[str, "ResticEngine"] = {}
+    pwd_file_path = Path(pwd_file) if pwd_file else None
     for repo_path in repo_paths:
         logger.info(f"Trying repository target: {repo_path}")
         try:
-            engine = ResticEngine(
-                repo_path=Path(repo_path),
-                password=pwd,
-                password_file=Path(pwd_file) if pwd_file else None,
-            )
+            engines[repo_path] = _make_engine(Path(repo_path), pwd, pwd_file_path)
+        except Exception as e:
+            logger.warning(f"Repository {repo_path} is not accessible: {e}")
+            last_error = e
 
-            needs_init = not engine.repository_exists()
-
-            if not needs_init:
-                # Repository appears to exist, verify it's actually accessible
-                try:
-                    engine.snapshots()
-                    logger.info(f"Using repository: {repo_path}")
-                    return repo_path, engine
-                except Exception as e:
-                    logger.warning(
-                        f"Repository at {repo_path} exists but is not "
-                        f"accessible: {e}. Attempting re-initialization..."
-                    )
-                    needs_init = True
-
-            if needs_init:
-                logger.info(
-                    f"Repository does not exist at {repo_path}, initializing..."
+    # Targets where restic found no repository
+    missing: Set[str] = set()
+    futures = {repo_path: _start_probe(engine) for repo_path, engine in engines.items()}
+    # Results are taken in configured order, so an earlier target wins even if
+    # a later one answers first. While there are other targets, each is given
+    # until the deadline; the ones that run over are then waited on in full,
+    # as a slow target may still be a working one and must never be
+    # initialized over.
+    deadline = time.monotonic() + REPO_PROBE_TIMEOUT if len(futures) > 1 else None
+    pending = list(futures)
+    while pending:
+        unanswered: List[str] = []
+        for repo_path in pending:
+            future = futures[repo_path]
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if not wait([future], timeout=remaining).done:
+                logger.warning(
+                    f"Repository {repo_path} did not answer within "
+                    f"{REPO_PROBE_TIMEOUT:g}s"
                 )
-                returncode, _, stderr = engine._run_command(["init"], check=False)
-                if returncode == 0:
-                    logger.info(f"Successfully initialized repository at {repo_path}")
-                else:
-                    logger.warning(
-                        f"Failed to initialize repository at {repo_path}: {stderr}"
-                    )
-                    last_error = RuntimeError(
-                        f"Failed to initialize repository: {stderr}"
-                    )
-                    continue
-
-            # Verify the (re-)initialized repository is accessible
-            engine.snapshots()
+                unanswered.append(repo_path)
+                continue
+            try:
+                returncode, stderr = future.result()
+            except Exception as e:
+                logger.warning(f"Repository {repo_path} is not accessible: {e}")
+                last_error = e
+                continue
+            if returncode == 0:
+                logger.info(f"Using repository: {repo_path}")
+                return repo_path, engines[repo_path]
+            error = _unopened_error(repo_path, returncode, stderr)
+            if error is None:
+                missing.add(repo_path)
+            else:
+                last_error = RuntimeError(error)
+        if unanswered:
+            logger.info(f"Waiting for repository targets: {', '.join(unanswered)}")
+        pending, deadline = unanswered, None
+
+    # No target could be opened; initialize the first one without a repository
+    for repo_path in repo_paths:
+        if repo_path not in missing:
+            continue  # the engine could not be created, or the repository exists
+        engine = engines[repo_path]
+        try:
+            logger.info(f"Initializing repository at {repo_path}...")
+            returncode, _, stderr = engine._run_command(["init"], check=False)
+            if returncode == 0:
+                logger.info(f"Successfully initialized repository at {repo_path}")
+            else:
+                logger.warning(
+                    f"Failed to initialize repository at {repo_path}: {stderr}"
+                )
+                last_error = RuntimeError(f"Failed to initialize repository: {stderr}")
+                continue
+
+            # Verify the initialized repository is accessible
+            if not engine.is_accessible():
+                raise RuntimeError("repository cannot be opened after init")
             logger.info(f"Using repository: {repo_path}")
             return repo_path, engine
         except Exception as e:
@@ -195,74 +499,83 @@ def find_accessible_repo(
             last_error = e
             continue
 
-    error_msg = "No accessible repositories found"
+    error_msg = _NO_ACCESSIBLE_REPO_MSG
     if last_error:
         error_msg += f": {last_error}"
     logger.error(error_msg)
     return None
 
 
+def require_repo(
+    repo: Optional[str], password: Optional[str], password_file: Optional[str]
+) -> Tuple[str, "ResticEngine"]:
+    """
+    Resolve credentials and return the first accessible repository and its engine.
+
+    Exits with status 1, writing the reason to stderr, if the repository path
+    or password is missing or no repository target can be opened.
+    """
+    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
+
+    if not repo_paths:
+        fatal(_MISSING_REPO_MSG)
+
+    if not pwd and not pwd_file:
+        fatal(_MISSING_PASSWORD_MSG)
+
+    result = find_accessible_repo(repo_paths, pwd, pwd_file)
+    if result is None:
+        # find_accessible_repo has already logged why
+        typer.echo(_NO_ACCESSIBLE_REPO_MSG, err=True)
+        raise typer.Exit(1)
+    return result
+
+
 @app.callback(invoke_without_command=True)
 def callback(
-    verbose: bool = typer.Option(
-        False, "--verbose", "-v", help="Enable verbose output."
-    ),
-    json: bool = typer.Option(False, "--json", help="Output logs in JSON format."),
-    version: bool = typer.Option(
-        False, "--version", help="Show the application version and exit."
-    ),
+    ctx: typer.Context,
+    verbose: Annotated[
+        bool, typer.Option("--verbose", "-v", help="Enable verbose output.")
+    ] = False,
+    json: Annotated[
+        bool, typer.Option("--json", help="Output logs in JSON format.")
+    ] = False,
+    version: Annotated[
+        bool, typer.Option("--version", help="Show the application version and exit.")
+    ] = False,
 ) -> None:
     """
     TimeVault: Snapshot what matters, remember how to rebuild the rest.
     """
     if version:
-        console.print(f"timevault version: {__version__}")
+        typer.echo(f"timevault version: {__version__}")
         raise typer.Exit()
+    if ctx.invoked_subcommand == "version":
+        # Nothing is logged, so skip building the log handler and console
+        return
+
+    configure_logging(json_output=json, verbose=verbose)
 
     # Configure logging level based on verbosity
     if verbose:
         logger.setLevel(logging.DEBUG)
         logger.debug("Verbose logging enabled")
 
-    # Configure JSON logging if requested
     if json:
-        # Reconfigure logging for JSON output
-        for handler in logging.root.handlers:
-            logging.root.removeHandler(handler)
-        logging.basicConfig(
-            level=logging.INFO if not verbose else logging.DEBUG,
-            format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", '
-            '"message": "%(message)s"}',
-            datefmt="%Y-%m-%dT%H:%M:%S",
-            stream=sys.stdout,
-        )
         logger.debug("JSON logging enabled")
 
 
 @app.command()
 def init(
-    repo: Optional[str] = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified. "
-        "Can be semicolon-separated list.",
-    ),
-    password: Optional[str] = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: Optional[str] = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
-    wizard: bool = typer.Option(
-        True,
-        "--wizard/--no-wizard",
-        help="Run interactive configuration wizard.",
-    ),
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
+    wizard: Annotated[
+        bool,
+        typer.Option(
+            "--wizard/--no-wizard", help="Run interactive configuration wizard."
+        ),
+    ] = True,
 ) -> None:
     """
     Initialize TimeVault with configuration wizard.
@@ -275,38 +588,24 @@ def init(
     repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
 
     if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
+        fatal(_MISSING_REPO_MSG)
 
     # The init command requires a password, not a password file.
     if not pwd:
-        logger.error(
-            "A password must be provided via --password or TIMELESS_PASSWORD for init."
-        )
-        raise typer.Exit(1)
-
-    # This assertion is for mypy to confirm pwd is not None.
-    assert pwd is not None
+        fatal(_MISSING_INIT_PASSWORD_MSG)
 
     # Track if at least one repository was successfully initialized
     any_success = False
     errors = []
+    pwd_file_path = Path(pwd_file) if pwd_file else None
 
     # Try to initialize each repository in the list
     for repo_path in repo_paths:
         logger.info(f"Processing repository target: {repo_path}")
+        repo_dir = Path(repo_path)
         try:
             # Create a new engine for each repository
-            engine = ResticEngine(
-                repo_path=Path(repo_path),
-                password=pwd,
-                password_file=Path(pwd_file) if pwd_file else None,
-            )
+            engine = _make_engine(repo_dir, pwd, pwd_file_path)
 
             # Check if repository already exists using direct filesystem or SFTP check
             if engine.repository_exists():
@@ -326,7 +625,7 @@ def init(
                 )
 
             # Initialize the repository
-            if engine.init(repo_path=Path(repo_path), password=pwd):
+            if engine.init(repo_path=repo_dir, password=pwd):
                 message = f"Successfully initialized repository at {repo_path}"
                 logger.info(message)
                 # Print to stdout for test detection
@@ -350,14 +649,21 @@ def init(
         # Save the original semicolon-separated string
         repo_str = ";".join(repo_paths)
         try:
-            keyring.set_password("TIMELESS_REPO", "timevault", repo_str)
-            keyring.set_password("TIMELESS_PASSWORD", "timevault", pwd)
+            import keyring
+
+            keyring.set_password(
+                "TIMELESS",
+                "timevault",
+                json.dumps({"repo": repo_str, "password": pwd}),
+            )
             logger.info("Credentials saved successfully.")
         except Exception as e:
             logger.warning(
                 f"Failed to save credentials to keyring: {e}. "
                 "Use environment variables or command-line arguments instead."
             )
+        # Re-read the keyring on the next lookup, even after a partial write
+        _keyring_cache.clear()
 
         if errors:
             warning_msg = "Some repositories had initialization errors:"
@@ -392,14 +698,7 @@ def backup(
             )
         ),
     ] = None,
-    repo: Annotated[
-        Optional[str],
-        typer.Option(
-            "--repo",
-            "-r",
-            help="Path to the repository. Uses TIMELESS_REPO env var if not set.",
-        ),
-    ] = None,
+    repo: RepoOption = None,
     policy_file: Annotated[
         Optional[str],
         typer.Option(
@@ -408,20 +707,8 @@ def backup(
             help="Path to retention policy file. Uses default policy if not specified.",
         ),
     ] = None,
-    password: Annotated[
-        Optional[str],
-        typer.Option(
-            "--password",
-            help="Repository password. Uses TIMELESS_PASSWORD env var if not set.",
-        ),
-    ] = None,
-    password_file: Annotated[
-        Optional[str],
-        typer.Option(
-            "--password-file",
-            help="Path to password file (uses $TIMELESS_PASSWORD_FILE).",
-        ),
-    ] = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
     tags: Annotated[
         Optional[List[str]],
         typer.Option("--tag", "-t", help="Tags to apply to the snapshot."),
@@ -442,32 +729,16 @@ def backup(
 
     logger.info("Running backup...")
 
-    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
+    repo_path, engine = require_repo(repo, password, password_file)
 
-    if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    if not pwd and not pwd_file:
-        error_msg = (
-            "Password not specified. "
-            "Use --password, --password-file, set env vars, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
+    from timeless_py.retention import RetentionEvaluator, RetentionPolicy
 
     # Load retention policy
     config = get_config()
     policy = None
     if policy_file:
         logger.info(f"Loading retention policy from {policy_file}")
-        policy = RetentionPolicy.from_file(policy_file)
+        policy = load_retention_policy(policy_file)
     else:
         # Build retention from config values, falling back to RetentionPolicy defaults
         rc = config.retention
@@ -486,27 +757,25 @@ def backup(
         else:
             logger.info("Using default retention policy")
 
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
-
     # Manifest refresh
     with tempfile.TemporaryDirectory(prefix="timevault-manifests-") as temp_dir_str:
         temp_dir = Path(temp_dir_str)
         logger.info(f"Generating manifests in temporary directory: {temp_dir}")
 
-        manifest_paths = []
+        from timeless_py.manifest.apps import generate_apps_manifest
+        from timeless_py.manifest.brew import generate_brewfile
+        from timeless_py.manifest.mas import generate_mas_manifest
+
+        generators: List[Callable[[Path], Optional[Path]]] = []
         if is_macos():
-            if brewfile_path := generate_brewfile(temp_dir):
-                manifest_paths.append(brewfile_path)
-            if mas_manifest_path := generate_mas_manifest(temp_dir):
-                manifest_paths.append(mas_manifest_path)
-        if apps_manifest_path := generate_apps_manifest(temp_dir):
-            manifest_paths.append(apps_manifest_path)
+            generators += [generate_brewfile, generate_mas_manifest]
+        generators.append(generate_apps_manifest)
+
+        # Each generator shells out and writes its own file, so run them
+        # concurrently; results are collected in submission order.
+        with ThreadPoolExecutor(max_workers=len(generators)) as executor:
+            futures = [executor.submit(gen, temp_dir) for gen in generators]
+            manifest_paths = [p for f in futures if (p := f.result()) is not None]
 
         if manifest_paths:
             logger.info("Backing up generated manifests...")
@@ -532,7 +801,8 @@ def backup(
     if paths:
         # If paths are provided, back them up directly
         backup_paths = [Path(p).expanduser() for p in paths]
-        logger.info(f"Backing up specified paths: {backup_paths}")
+        paths_str = ", ".join(map(str, backup_paths))
+        logger.info(f"Backing up {len(backup_paths)} specified paths: {paths_str}")
         snapshot_id = engine.backup(
             paths=backup_paths,
             tags=tags or [],
@@ -540,8 +810,7 @@ def backup(
             verbose=verbose,
         )
         if not snapshot_id and not verbose:
-            log_error("Backup of specified paths failed.")
-            raise typer.Exit(1)
+            fatal("Backup of specified paths failed.")
         else:
             logger.info(f"Backup successful. Snapshot ID: {snapshot_id}")
 
@@ -567,13 +836,15 @@ def backup(
             # macOS: back up home, Library, and CloudStorage separately
             library_dir = home_dir / "Library"
             cloud_storage_dir = library_dir / "CloudStorage"
+            cloud_storage_exists = cloud_storage_dir.exists()
+
+            # Build the exclusion lists for the home and Library backups once
+            cloud_exclusions = [str(cloud_storage_dir)] if cloud_storage_exists else []
+            exclusions = [*combined_excludes, str(library_dir), *cloud_exclusions]
+            library_exclusions = [*combined_excludes, *cloud_exclusions]
 
             # 1. Backup home directory, excluding Library and CloudStorage
             logger.info(f"Backing up home directory ({home_dir}) with exclusions...")
-            exclusions = combined_excludes + [str(library_dir)]
-            if cloud_storage_dir.exists():
-                exclusions.append(str(cloud_storage_dir))
-
             engine.backup(
                 paths=[home_dir],
                 exclude_patterns=exclusions,
@@ -584,10 +855,6 @@ def backup(
             # 2. Backup Library, excluding CloudStorage
             if library_dir.exists():
                 logger.info(f"Backing up Library directory ({library_dir})...")
-                library_exclusions = combined_excludes[:]
-                if cloud_storage_dir.exists():
-                    library_exclusions.append(str(cloud_storage_dir))
-
                 engine.backup(
                     paths=[library_dir],
                     exclude_patterns=library_exclusions,
@@ -596,15 +863,17 @@ def backup(
                 )
 
             # 3. Backup Cloud Storage directories
-            if cloud_storage_dir.exists():
-                for provider_dir in cloud_storage_dir.iterdir():
-                    if provider_dir.is_dir():
-                        logger.info(
-                            f"Backing up {provider_dir.name} ({provider_dir})..."
-                        )
+            if cloud_storage_exists:
+                # scandir entries carry the file type, so is_dir() needs no
+                # extra stat except for symlinks
+                with os.scandir(cloud_storage_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_dir():
+                            continue
+                        logger.info(f"Backing up {entry.name} ({entry.path})...")
                         engine.backup(
-                            paths=[provider_dir],
-                            tags=base_tags + [f"cloud-{provider_dir.name.lower()}"],
+                            paths=[Path(entry.path)],
+                            tags=base_tags + [f"cloud-{entry.name.lower()}"],
                             exclude_patterns=combined_excludes,
                             verbose=verbose,
                         )
@@ -643,72 +912,30 @@ def backup(
             logger.info(
                 f"Forgetting {len(to_forget)} snapshots based on retention policy"
             )
-            if engine.forget(to_forget):
-                logger.info("Pruning repository...")
-                if engine.prune():
-                    logger.info("Pruning successful")
-                else:
-                    logger.error("Pruning failed")
+            # One restic run forgets and prunes, paying its startup once
+            if engine.forget(to_forget, prune=True):
+                logger.info("Pruning successful")
             else:
-                logger.error("Failed to forget snapshots")
+                logger.error("Failed to forget and prune snapshots")
         else:
             logger.info("No snapshots to forget based on retention policy")
 
 
 @app.command(name="snapshots")
 def list_snapshots(
-    json_output: bool = typer.Option(
-        False, "--json", help="Output snapshots in JSON format."
-    ),
-    repo: str = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified.",
-    ),
-    password: str = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: str = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
+    json_output: Annotated[
+        bool, typer.Option("--json", help="Output snapshots as JSON lines.")
+    ] = False,
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
 ) -> None:
     """
     List available snapshots.
     """
     logger.info("Listing snapshots...")
 
-    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
-
-    if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    if not pwd and not pwd_file:
-        error_msg = (
-            "Password not specified. "
-            "Use --password, --password-file, set env vars, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
+    repo_path, engine = require_repo(repo, password, password_file)
 
     # Get snapshots
     snapshots = engine.snapshots()
@@ -719,62 +946,52 @@ def list_snapshots(
 
     # Output snapshots
     if json_output:
-        snapshot_data = [
-            {
-                "id": snap.id,
-                "time": snap.time.isoformat(),
-                "hostname": snap.hostname,
-                "paths": [str(p) for p in snap.paths],
-                "tags": snap.tags,
-            }
-            for snap in snapshots
-        ]
-        console.print(json.dumps(snapshot_data, indent=2))
+        # One JSON object per line, streamed without Rich's styling pass
+        out = sys.stdout
+        dumps = _json_dumps()
+        for snap in snapshots:
+            out.write(
+                dumps(
+                    {
+                        "id": snap.id,
+                        "time": snap.time,
+                        "hostname": snap.hostname,
+                        "paths": [str(p) for p in snap.paths],
+                        "tags": snap.tags,
+                    }
+                )
+            )
+            out.write("\n")
     else:
         from rich.table import Table
 
-        table = Table(title="Available Snapshots")
-        table.add_column("ID")
-        table.add_column("Time")
-        table.add_column("Hostname")
-        table.add_column("Paths")
-        table.add_column("Tags")
-
-        for snap in snapshots:
-            table.add_row(
+        rows = [
+            (
                 snap.id[:8],  # Short ID
-                str(snap.time),
+                snap.time.isoformat(sep=" ", timespec="seconds"),
                 snap.hostname,
-                "\n".join(str(p) for p in snap.paths),
+                "\n".join(map(str, snap.paths)),
                 ", ".join(snap.tags),
             )
-        console.print(table)
+            for snap in snapshots
+        ]
+        table = Table(
+            "ID", "Time", "Hostname", "Paths", "Tags", title="Available Snapshots"
+        )
+        for row in rows:
+            table.add_row(*row)
+        get_console().print(table)
 
 
 @app.command()
 def mount(
-    target: Optional[str] = typer.Option(
-        None,
-        "--target",
-        "-t",
-        help="Mount point for the repository.",
-    ),
-    repo: str = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified.",
-    ),
-    password: str = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: str = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
+    target: Annotated[
+        Optional[str],
+        typer.Option("--target", "-t", help="Mount point for the repository."),
+    ] = None,
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
 ) -> None:
     """
     Mount selected snapshot at /Volumes/Timeless.
@@ -784,33 +1001,7 @@ def mount(
         target = config.mount_path or default_mount_path()
     logger.info(f"Mounting snapshot at {target}...")
 
-    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
-
-    if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    if not pwd and not pwd_file:
-        error_msg = (
-            "Password not specified. "
-            "Use --password, --password-file, set env vars, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
+    repo_path, engine = require_repo(repo, password, password_file)
 
     # Prepare target path
     target_path = Path(target).expanduser()
@@ -830,11 +1021,14 @@ def mount(
         logger.info("Press Ctrl+C to unmount")
 
         try:
-            # Keep the process running until user interrupts
-            import time
-
-            while True:
-                time.sleep(1)
+            # Block until the user interrupts. pause() also returns after any
+            # other handled signal, so keep waiting; it is unavailable on
+            # Windows, where we wait on an event that is never set instead.
+            try:
+                while True:
+                    signal.pause()
+            except AttributeError:
+                threading.Event().wait()
         except KeyboardInterrupt:
             logger.info("Unmounting repository...")
             if engine.unmount(target_path):
@@ -849,32 +1043,21 @@ def mount(
 
 @app.command()
 def restore(
-    snapshot: str = typer.Argument(
-        ..., help="Snapshot ID or timestamp to restore from."
-    ),
-    path: str = typer.Argument(..., help="Path to restore from snapshot."),
-    target: Optional[str] = typer.Option(
-        None,
-        "--target",
-        "-t",
-        help="Target path for restoration (default: current directory).",
-    ),
-    repo: str = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified.",
-    ),
-    password: str = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: str = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
+    snapshot: Annotated[
+        str, typer.Argument(help="Snapshot ID or timestamp to restore from.")
+    ],
+    path: Annotated[str, typer.Argument(help="Path to restore from snapshot.")],
+    target: Annotated[
+        Optional[str],
+        typer.Option(
+            "--target",
+            "-t",
+            help="Target path for restoration (default: current directory).",
+        ),
+    ] = None,
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
 ) -> None:
     """
     Restore a file or directory from a snapshot.
@@ -882,33 +1065,7 @@ def restore(
     target_display = target if target else "current directory"
     logger.info(f"Restoring {path} from snapshot {snapshot} to {target_display}...")
 
-    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
-
-    if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    if not pwd and not pwd_file:
-        error_msg = (
-            "Password not specified. "
-            "Use --password, --password-file, set env vars, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
+    repo_path, engine = require_repo(repo, password, password_file)
 
     # Prepare target path
     target_path = Path(target).expanduser() if target else Path.cwd()
@@ -919,136 +1076,61 @@ def restore(
         logger.info(
             f"Successfully restored {path} from snapshot {snapshot} to {target_path}"
         )
-        console.print(
+        get_console().print(
             f"Successfully restored {path} from snapshot {snapshot} to {target_path}"
         )
     else:
-        logger.error(f"Failed to restore {path} from snapshot {snapshot}")
-        console.print(f"[red]Failed to restore {path} from snapshot {snapshot}[/red]")
-        raise typer.Exit(1)
+        fatal(f"Failed to restore {path} from snapshot {snapshot}")
 
 
 @app.command()
 def check(
-    repo: str = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified.",
-    ),
-    password: str = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: str = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
 ) -> None:
     """
     Invoke engine integrity check and report via notification center.
     """
     logger.info("Running repository integrity check...")
 
-    repo_paths, pwd, pwd_file = get_repo_credentials(repo, password, password_file)
-
-    if not repo_paths:
-        error_msg = (
-            "Repository path not specified. "
-            "Use --repo, set TIMELESS_REPO env var, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    if not pwd and not pwd_file:
-        error_msg = (
-            "Password not specified. "
-            "Use --password, --password-file, set env vars, or run init first."
-        )
-        logger.error(error_msg)
-        console.print(f"[red]{error_msg}[/red]")
-        raise typer.Exit(1)
-
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
+    repo_path, engine = require_repo(repo, password, password_file)
 
     # Run check
     logger.info("Checking repository integrity...")
     if engine.check():
         logger.info("Repository integrity check passed")
-        console.print("Repository integrity check passed")
+        get_console().print("Repository integrity check passed")
         # TODO: Send success notification via notification center
     else:
-        logger.error("Repository integrity check failed")
-        console.print("[red]Repository integrity check failed[/red]")
         # TODO: Send failure notification via notification center
-        raise typer.Exit(1)
+        fatal("Repository integrity check failed")
 
 
 @app.command(name="brew-replay")
 def brew_replay(
-    repo: Optional[str] = typer.Option(
-        None,
-        "--repo",
-        "-r",
-        help="Path to the repository. Uses TIMELESS_REPO env var if not specified.",
-    ),
-    password: Optional[str] = typer.Option(
-        None,
-        "--password",
-        help="Repository password. Uses TIMELESS_PASSWORD env var if not specified.",
-    ),
-    password_file: Optional[str] = typer.Option(
-        None,
-        "--password-file",
-        help="Path to password file. Uses TIMELESS_PASSWORD_FILE env var if not set.",
-    ),
+    repo: RepoOption = None,
+    password: PasswordOption = None,
+    password_file: PasswordFileOption = None,
 ) -> None:
     """
     Reinstall software from manifests onto a clean Mac.
     """
     logger.info("Starting software replay from manifests...")
 
-    repo_paths, _, _ = get_repo_credentials(repo, None, None)
-    if not repo_paths:
-        log_error(
-            "Repository path must be provided via --repo, "
-            "TIMELESS_REPO env var, or by running init."
-        )
-        raise typer.Exit(1)
+    repo_path, engine = require_repo(repo, password, password_file)
 
-    # Determine password or password file
-    pwd = password or os.environ.get("TIMELESS_PASSWORD")
-    pwd_file = password_file or os.environ.get("TIMELESS_PASSWORD_FILE")
-
-    if not pwd and not pwd_file:
-        logger.error(
-            "Password must be provided via --password, --password-file, "
-            "TIMELESS_PASSWORD, or TIMELESS_PASSWORD_FILE env vars."
-        )
-        raise typer.Exit(1)
-
-    # Find the first accessible repository
-    result = find_accessible_repo(repo_paths, pwd, pwd_file)
-    if result is None:
-        console.print("[red]No accessible repositories found[/red]")
-        raise typer.Exit(1)
-
-    repo_path, engine = result
+    from timeless_py.manifest.replay import (
+        find_latest_manifest_snapshot,
+        replay_brewfile,
+        replay_mas_manifest,
+        restore_manifests,
+    )
 
     # Find the latest manifest snapshot
     latest_manifest = find_latest_manifest_snapshot(engine)
     if not latest_manifest:
-        log_error("Could not find a manifest snapshot. Nothing to replay.")
-        raise typer.Exit(1)
+        fatal("Could not find a manifest snapshot. Nothing to replay.")
 
     with tempfile.TemporaryDirectory(prefix="timevault-replay-") as temp_dir_str:
         temp_dir = Path(temp_dir_str)
@@ -1057,8 +1139,7 @@ def brew_replay(
         restored_manifests = restore_manifests(engine, latest_manifest.id, temp_dir)
 
         if not restored_manifests:
-            log_error("Failed to restore any manifests. Aborting replay.")
-            raise typer.Exit(1)
+            fatal("Failed to restore any manifests. Aborting replay.")
 
         # Replay Brewfile if it exists
         if "Brewfile" in restored_manifests:
@@ -1076,25 +1157,27 @@ def brew_replay(
 
         # Provide guidance for applications.json
         if "applications.json" in restored_manifests:
-            console.print(
+            get_console().print(
                 "\n[bold yellow]Manual Action Required for Applications:[/bold yellow]"
             )
-            console.print(
+            get_console().print(
                 f"An application manifest has been restored to: "
                 f"[cyan]{restored_manifests['applications.json']}[/cyan]"
             )
-            console.print(
+            get_console().print(
                 "This file lists GUI applications that may need to be reinstalled "
                 "manually."
             )
 
-        console.print("\n[bold green]Manifest replay process complete.[/bold green]")
+        get_console().print(
+            "\n[bold green]Manifest replay process complete.[/bold green]"
+        )
 
 
 @app.command()
 def version() -> None:
     """Show the application version and exit."""
-    console.print(f"timevault version: {__version__}")
+    typer.echo(f"timevault version: {__version__}")
 
 
 if __name__ == "__main__":
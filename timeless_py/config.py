@@ -10,12 +10,28 @@ import logging
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import yaml
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger("timevault.config")
 
+# Parsed config files by path, with the st_mtime_ns and st_size they were
+# parsed at; an entry is replaced once either changes
+_config_cache: Dict[str, Tuple[int, int, "TimevaultConfig"]] = {}
+
+
+def _expand_user(value: str, home: str) -> str:
+    """Expand a leading ``~`` in *value* like ``os.path.expanduser``.
+
+    *home* is the home directory without a trailing separator. Other text is
+    returned as is, without the normalization ``Path`` would apply.
+    """
+    if not value.startswith("~"):
+        return value
+    if len(value) == 1 or value[1] in ("/", os.sep):
+        return home + value[1:] or os.sep
+    # ~user forms need a password database lookup
+    return os.path.expanduser(value)
+
 
 def default_config_path() -> Path:
     """Return the default configuration file path.
@@ -29,7 +45,7 @@ def default_config_path() -> Path:
     return Path.home() / ".config" / "timevault" / "config.yaml"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BackupPath:
     """A single backup path entry from the configuration file."""
 
@@ -38,7 +54,7 @@ class BackupPath:
     exclude: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RetentionConfig:
     """Retention schedule from the configuration file.
 
@@ -53,9 +69,13 @@ class RetentionConfig:
     yearly: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TimevaultConfig:
-    """Top-level configuration loaded from the YAML file."""
+    """Top-level configuration loaded from the YAML file.
+
+    ``from_file`` hands the same cached instance to every caller, so the
+    configuration classes are immutable.
+    """
 
     repo: Optional[str] = None
     mount_path: Optional[str] = None
@@ -69,6 +89,9 @@ class TimevaultConfig:
         if not isinstance(data, dict):
             return cls()
 
+        # Resolved once for every path and pattern below
+        home = os.path.expanduser("~").rstrip(os.sep)
+
         backup_paths: List[BackupPath] = []
         for entry in data.get("backup_paths", []):
             if not isinstance(entry, dict) or "path" not in entry:
@@ -76,10 +99,10 @@ class TimevaultConfig:
                 continue
             backup_paths.append(
                 BackupPath(
-                    path=Path(entry["path"]).expanduser(),
+                    path=Path(_expand_user(str(entry["path"]), home)),
                     tag=entry.get("tag"),
                     exclude=[
-                        str(Path(e).expanduser()) for e in entry.get("exclude", [])
+                        _expand_user(str(e), home) for e in entry.get("exclude", [])
                     ],
                 )
             )
@@ -98,7 +121,7 @@ class TimevaultConfig:
             mount_path=data.get("mount_path"),
             backup_paths=backup_paths,
             exclude_patterns=[
-                str(Path(e).expanduser()) for e in data.get("exclude_patterns", [])
+                _expand_user(str(e), home) for e in data.get("exclude_patterns", [])
             ],
             retention=retention,
         )
@@ -107,11 +130,33 @@ class TimevaultConfig:
     def from_file(cls, path: Path) -> "TimevaultConfig":
         """Read a YAML file and return a ``TimevaultConfig``.
 
-        Returns an empty default config on any error.
+        Returns an empty default config on any error. The result is reused
+        while the file's modification time and size are unchanged, so it may
+        be shared between calls and must not be mutated.
         """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return cls._parse_file(path)  # reports the error
+        key = str(path)
+        cached = _config_cache.get(key)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        cfg = cls._parse_file(path)
+        _config_cache[key] = (st.st_mtime_ns, st.st_size, cfg)
+        return cfg
+
+    @classmethod
+    def _parse_file(cls, path: Path) -> "TimevaultConfig":
+        """Parse the YAML file at *path*, returning defaults on any error."""
+        # Imported here so that runs without a config file never load yaml
+        import yaml
+
+        # libyaml's C loader when PyYAML was built with it; same safe schema
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         try:
             with open(path, "r") as f:
-                data = yaml.safe_load(f.read())
+                data = yaml.load(f, Loader=loader)
             if data is None:
                 return cls()
             return cls.from_dict(data)
@@ -12,9 +12,13 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Snapshot:
-    """Represents a backup snapshot."""
+    """Represents a backup snapshot.
+
+    Snapshots are created in bulk when listing and evaluating retention, so
+    the class uses slots and is immutable once built.
+    """
 
     id: str
     time: datetime
@@ -55,17 +59,26 @@ class BaseEngine(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def snapshots(self) -> List[Snapshot]:
-        """List all snapshots in the repository."""
+    def snapshots(self, tags: Optional[List[str]] = None) -> List[Snapshot]:
+        """
+        List snapshots in the repository.
+
+        Args:
+            tags: Only list snapshots carrying all of these tags
+
+        Returns:
+            List of Snapshot objects
+        """
         pass
 
     @abc.abstractmethod
-    def forget(self, snapshot_ids: List[str]) -> bool:
+    def forget(self, snapshot_ids: List[str], prune: bool = False) -> bool:
         """
         Remove snapshots from the repository index.
 
         Args:
             snapshot_ids: List of snapshot IDs to forget
+            prune: Also remove the data no longer referenced
 
         Returns:
             True if successful, False otherwise
@@ -6,24 +6,159 @@ This module provides a wrapper around the Restic backup tool,
 handling subprocess calls and JSON parsing.
 """
 
+import functools
 import json
 import logging
 import os
 import shlex
 import subprocess
+import tempfile
+from collections import deque
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from timeless_py.engine import BaseEngine, Snapshot
 from timeless_py.platform import unmount_command
 
 logger = logging.getLogger("timevault.engine.restic")
 
+# Environment passed on to restic: the process basics restic, ssh and rclone
+# rely on, what a password command (pass, gpg, secret-tool) or ssh askpass
+# needs to reach its agent or desktop session, plus everything under the
+# prefixes of restic's documented settings (storage backend credentials,
+# cache location, Go runtime and locale), custom TLS CAs and Kerberos
+_PASSTHROUGH_ENV_KEYS = frozenset(
+    {
+        "PATH",
+        "HOME",
+        "USER",
+        "LOGNAME",
+        "SHELL",
+        "TERM",
+        "COLUMNS",
+        "TMPDIR",
+        "TZ",
+        "LANG",
+        "DISPLAY",
+        "WAYLAND_DISPLAY",
+        "XAUTHORITY",
+        "DBUS_SESSION_BUS_ADDRESS",
+        "GNUPGHOME",
+        "PINENTRY_USER_DATA",
+        "HTTP_PROXY",
+        "HTTPS_PROXY",
+        "NO_PROXY",
+        "ALL_PROXY",
+        "http_proxy",
+        "https_proxy",
+        "no_proxy",
+        "all_proxy",
+    }
+)
+_PASSTHROUGH_ENV_PREFIXES = (
+    "RESTIC_",
+    "AWS_",
+    "AZURE_",
+    "B2_",
+    "GOOGLE_",
+    "OS_",
+    "ST_",
+    "RCLONE_",
+    "SSH_",
+    "XDG_",
+    "LC_",
+    "GO",
+    "SSL_",
+    "GPG_",
+    "PASSWORD_STORE_",
+    "KRB5",
+)
+
+# restic's exit code, and the messages older releases print, when there is
+# no repository at the given location
+_MISSING_REPO_EXIT_CODE = 10
+_MISSING_REPO_MESSAGES = (
+    "unable to open config file",
+    "Is there a repository at the following location",
+    "repository does not exist",
+)
+
+# Fields every entry of `restic snapshots --json` carries
+_snapshot_fields = itemgetter("id", "time", "hostname", "paths")
+
+# Only backup output lines containing this key are worth parsing as JSON
+_SNAPSHOT_ID_KEY = '"snapshot_id"'
+
+
+def repository_missing(returncode: int, stderr: str) -> bool:
+    """Tell whether a failed restic command found no repository to open."""
+    return returncode == _MISSING_REPO_EXIT_CODE or any(
+        message in stderr for message in _MISSING_REPO_MESSAGES
+    )
+
+
+def _format_command(cmd: List[str]) -> str:
+    """Quote a command line for logging."""
+    return " ".join([shlex.quote(arg) for arg in cmd])
+
+
+@functools.lru_cache(maxsize=None)
+def _json_loads() -> Callable[[Union[str, bytes]], Any]:
+    """
+    Return a JSON parser, using orjson when it is installed.
+
+    orjson is optional (the ``fast`` extra). Both parsers accept bytes, and
+    orjson's decode error subclasses ``json.JSONDecodeError``.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def _write_exclude_file(patterns: List[str]) -> Tuple[Path, List[str]]:
+    """
+    Write exclude patterns to a temporary file for restic's --exclude-file.
+
+    Restic expands environment variables in exclude files, skips lines that
+    start with ``#`` and trims whitespace, so patterns it would not read back
+    verbatim are left out of the file and returned to be passed as --exclude.
+
+    Args:
+        patterns: Exclude patterns to write
+
+    Returns:
+        Tuple of (path of the file, patterns that were not written). The
+        caller removes the file.
+    """
+    leftover: List[str] = []
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".excl", prefix="timevault-", delete=False
+    ) as f:
+        for pattern in patterns:
+            if "$" in pattern or pattern.startswith("#") or pattern != pattern.strip():
+                leftover.append(pattern)
+            else:
+                f.write(f"{pattern}\n")
+    return Path(f.name), leftover
+
 
 class ResticEngine(BaseEngine):
     """Restic backup engine implementation."""
 
+    # Backups with more exclude patterns than this pass them in an exclude
+    # file instead of one --exclude argument each
+    EXCLUDE_FILE_THRESHOLD = 32
+
+    # Trailing lines of backup --json output kept to find the snapshot ID
+    SUMMARY_SCAN_LINES = 64
+
+    # Snapshot IDs passed to one forget call, keeping the argv far below ARG_MAX
+    FORGET_BATCH_SIZE = 1000
+
     def __init__(
         self,
         repo_path: Path,
@@ -44,6 +179,10 @@ class ResticEngine(BaseEngine):
         self.password = password
         self.password_file = password_file
         self.binary_path = binary_path
+        # (repo_path, password, password_file) the cached environment was built for
+        self._env_cache: Optional[
+            Tuple[Tuple[str, Optional[str], Optional[Path]], Dict[str, str]]
+        ] = None
 
         if not password and not password_file:
             raise ValueError("Either password or password_file must be provided")
@@ -70,15 +209,57 @@ class ResticEngine(BaseEngine):
                 logger.debug(f"Error checking SFTP repository existence: {e}")
                 return False
         else:
-            # Handle filesystem repositories
-            try:
-                # Check if directory exists and contains a config file
-                repo_dir = Path(repo_path_str)
-                config_file = repo_dir / "config"
-                return config_file.exists()
-            except Exception as e:
-                logger.debug(f"Error checking filesystem repository existence: {e}")
-                return False
+            # Handle filesystem repositories: the directory holds a config file.
+            # isfile returns False rather than raising for unusable paths.
+            return os.path.isfile(os.path.join(repo_path_str, "config"))
+
+    def check_access(self, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """
+        Try to open the repository with the configured credentials.
+
+        Reads only the repository config (``restic cat config``) instead of
+        listing every snapshot. Use repository_missing on a failure to tell a
+        missing repository from one that exists but cannot be opened.
+
+        Args:
+            timeout: Seconds to wait for restic; waits indefinitely if None
+
+        Returns:
+            Tuple of (returncode, stderr) from restic; 0 if it can be opened
+
+        Raises:
+            subprocess.TimeoutExpired: If restic did not answer within
+                ``timeout``, so accessibility is still unknown
+        """
+        returncode, _, stderr = self._run_command(
+            ["cat", "config"], check=False, timeout=timeout
+        )
+        return returncode, stderr
+
+    def is_accessible(self, timeout: Optional[float] = None) -> bool:
+        """
+        Check that the repository can be opened with the configured credentials.
+
+        Args:
+            timeout: Seconds to wait for restic; waits indefinitely if None
+
+        Returns:
+            bool: True if the repository can be opened, False otherwise
+
+        Raises:
+            subprocess.TimeoutExpired: If restic did not answer within
+                ``timeout``, so accessibility is still unknown
+        """
+        try:
+            returncode, stderr = self.check_access(timeout)
+        except subprocess.TimeoutExpired:
+            raise
+        except Exception as e:
+            logger.debug(f"Error checking repository access: {e}")
+            return False
+        if returncode != 0:
+            logger.debug(f"Repository is not accessible: {stderr}")
+        return returncode == 0
 
     def init(self, repo_path: Path, password: str) -> bool:
         """Initializes a new restic repository."""
@@ -97,8 +278,24 @@ class ResticEngine(BaseEngine):
             return False
 
     def _get_env(self) -> Dict[str, str]:
-        """Get the environment variables for Restic commands."""
-        env = os.environ.copy()
+        """
+        Get the environment variables for Restic commands.
+
+        Only the variables restic and its helpers read are passed on from
+        ``os.environ``. The environment is built once and reused until the
+        repository or password changes; later changes to ``os.environ`` are
+        not picked up. Callers must not modify the returned dict.
+        """
+        key = (str(self.repo_path), self.password, self.password_file)
+        if self._env_cache is not None and self._env_cache[0] == key:
+            return self._env_cache[1]
+
+        env = {
+            name: value
+            for name, value in os.environ.items()
+            if name in _PASSTHROUGH_ENV_KEYS
+            or name.startswith(_PASSTHROUGH_ENV_PREFIXES)
+        }
         env["RESTIC_REPOSITORY"] = str(self.repo_path)
 
         if self.password:
@@ -106,6 +303,7 @@ class ResticEngine(BaseEngine):
         elif self.password_file:
             env["RESTIC_PASSWORD_FILE"] = str(self.password_file)
 
+        self._env_cache = (key, env)
         return env
 
     def _run_command(
@@ -114,6 +312,7 @@ class ResticEngine(BaseEngine):
         capture_output: bool = True,
         check: bool = True,
         stream_output: bool = False,
+        timeout: Optional[float] = None,
     ) -> Tuple[int, str, str]:
         """
         Run a Restic command.
@@ -122,13 +321,15 @@ class ResticEngine(BaseEngine):
             args: Command arguments
             capture_output: Whether to capture stdout/stderr
             check: Whether to check the return code
+            timeout: Seconds before the command is killed and
+                subprocess.TimeoutExpired is raised; no limit if None
 
         Returns:
             Tuple of (return_code, stdout, stderr)
         """
         cmd = [self.binary_path] + args
-        cmd_str = " ".join(shlex.quote(str(arg)) for arg in cmd)
-        logger.debug(f"Running command: {cmd_str}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running command: %s", _format_command(cmd))
 
         try:
             # When streaming, we can't also capture the output.
@@ -141,17 +342,74 @@ class ResticEngine(BaseEngine):
                 capture_output=use_capture,
                 text=True,
                 check=check,
+                timeout=timeout,
             )
             return result.returncode, result.stdout or "", result.stderr or ""
         except subprocess.CalledProcessError as e:
-            logger.error(f"Command failed: {cmd_str}")
-            logger.error(f"Return code: {e.returncode}")
-            logger.error(f"Stdout: {e.stdout}")
-            logger.error(f"Stderr: {e.stderr}")
+            logger.error("Command failed: %s", _format_command(cmd))
+            logger.error("Return code: %s", e.returncode)
+            logger.error("Stdout: %s", e.stdout)
+            logger.error("Stderr: %s", e.stderr)
             if check:
                 raise
             return e.returncode, e.stdout, e.stderr
 
+    def _run_command_bytes(
+        self, args: List[str], check: bool = True
+    ) -> Tuple[int, bytes, bytes]:
+        """
+        Run a Restic command and return its output undecoded.
+
+        Used for JSON output, which the parser reads straight from bytes.
+
+        Args:
+            args: Command arguments
+            check: Whether to check the return code
+
+        Returns:
+            Tuple of (return_code, stdout, stderr)
+        """
+        cmd = [self.binary_path] + args
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running command: %s", _format_command(cmd))
+        result = subprocess.run(
+            cmd, env=self._get_env(), capture_output=True, check=check
+        )
+        return result.returncode, result.stdout or b"", result.stderr or b""
+
+    def _run_command_tail(
+        self, args: List[str], tail: int
+    ) -> Tuple[int, List[str], str]:
+        """
+        Run a Restic command, keeping only the last lines of its stdout.
+
+        Stdout is read line by line as the command runs, so memory stays
+        bounded however much it prints. Stderr goes to a temporary file
+        rather than a second pipe, which could fill up and block restic.
+
+        Args:
+            args: Command arguments
+            tail: Number of trailing stdout lines to keep
+
+        Returns:
+            Tuple of (return_code, last stdout lines, stderr)
+        """
+        cmd = [self.binary_path] + args
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running command: %s", _format_command(cmd))
+        with tempfile.TemporaryFile("w+") as err:
+            with subprocess.Popen(
+                cmd,
+                env=self._get_env(),
+                stdout=subprocess.PIPE,
+                stderr=err,
+                text=True,
+            ) as proc:
+                lines = deque(proc.stdout or (), maxlen=tail)
+                returncode = proc.wait()
+            err.seek(0)
+            return returncode, list(lines), err.read()
+
     def backup(
         self,
         paths: List[Path],
@@ -170,34 +428,38 @@ class ResticEngine(BaseEngine):
         Returns:
             Snapshot ID if successful, None otherwise
         """
-        args = ["backup"]
-        if verbose:
-            args.append("--verbose")
-        else:
-            # JSON output is required to parse the snapshot ID
-            args.append("--json")
+        # JSON output is required to parse the snapshot ID
+        args = ["backup", "--verbose" if verbose else "--json"]
+        args.extend([str(path) for path in paths])
 
-        # Add paths
-        for path in paths:
-            args.append(str(path))
-
-        # Add exclude patterns
+        # Add exclude patterns, through an exclude file when there are many
+        exclude_file: Optional[Path] = None
         if exclude_patterns:
-            for pattern in exclude_patterns:
-                args.append(f"--exclude={pattern}")
+            argv_patterns = exclude_patterns
+            if len(exclude_patterns) > self.EXCLUDE_FILE_THRESHOLD:
+                exclude_file, argv_patterns = _write_exclude_file(exclude_patterns)
+                args.append(f"--exclude-file={exclude_file}")
+            args.extend([f"--exclude={pattern}" for pattern in argv_patterns])
 
-        # Add tags
         if tags:
-            for tag in tags:
-                args.append(f"--tag={tag}")
+            args.extend([f"--tag={tag}" for tag in tags])
 
         try:
             # When verbose is True, stdout is streamed and not captured.
             # We also don't use --json, so we can't parse the snapshot ID.
-            capture_output = not verbose
-            returncode, stdout, stderr = self._run_command(
-                args, stream_output=verbose, capture_output=capture_output, check=False
-            )
+            lines: List[str] = []
+            try:
+                if verbose:
+                    returncode, _, stderr = self._run_command(
+                        args, stream_output=True, check=False
+                    )
+                else:
+                    returncode, lines, stderr = self._run_command_tail(
+                        args, self.SUMMARY_SCAN_LINES
+                    )
+            finally:
+                if exclude_file is not None:
+                    exclude_file.unlink(missing_ok=True)
 
             if returncode == 3:
                 # Restic returns  if some files could not be read. Treat as a warning.
@@ -212,38 +474,20 @@ class ResticEngine(BaseEngine):
                 # In verbose mode, we stream output and don't get a snapshot ID back.
                 return None
 
-            # Handle the case where stdout might be bytes (in tests) or string
-            # (from _run_command)
-            # First, try to handle it directly if it's a single JSON object
-            try:
-                if isinstance(stdout, bytes):
-                    data = json.loads(stdout.decode("utf-8"))
-                else:
-                    data = json.loads(stdout)
-                if data.get("message_type") == "summary":
+            # restic prints one JSON object per line and the summary with the
+            # snapshot ID comes last
+            loads = _json_loads()
+            for line in reversed(lines):
+                if _SNAPSHOT_ID_KEY not in line:
+                    continue
+                try:
+                    data = loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(data, dict) and "snapshot_id" in data:
                     snapshot_id = str(data["snapshot_id"])
                     logger.info(f"Created snapshot: {snapshot_id}")
                     return snapshot_id
-            except (json.JSONDecodeError, AttributeError):
-                # If it's not a single JSON object, try parsing line by line
-                try:
-                    if isinstance(stdout, bytes):
-                        lines = stdout.decode("utf-8").strip().split("\n")
-                    else:
-                        lines = stdout.strip().split("\n")
-
-                    for line in reversed(lines):
-                        try:
-                            data = json.loads(line)
-                            if "snapshot_id" in data:
-                                snapshot_id = str(data["snapshot_id"])
-                                logger.info(f"Created snapshot: {snapshot_id}")
-                                return snapshot_id
-                        except json.JSONDecodeError:
-                            continue
-                except Exception as e:
-                    logger.error(f"Error parsing backup output: {e}")
-                    pass
 
             logger.warning("Could not find snapshot ID in output")
             return None
@@ -251,59 +495,82 @@ class ResticEngine(BaseEngine):
             logger.error(f"Backup failed: {e}")
             return None
 
-    def snapshots(self) -> List[Snapshot]:
+    def snapshots(self, tags: Optional[List[str]] = None) -> List[Snapshot]:
         """
-        List all snapshots in the repository.
+        List snapshots in the repository.
+
+        The tag filter is applied by restic, so only matching snapshots are
+        returned and parsed.
+
+        Args:
+            tags: Only list snapshots carrying all of these tags
 
         Returns:
             List of Snapshot objects
         """
+        args = ["snapshots", "--json"]
+        if tags:
+            # A comma-separated --tag matches snapshots with all of the tags
+            args.append(f"--tag={','.join(tags)}")
+
         try:
-            _, stdout, _ = self._run_command(["snapshots", "--json"])
-            data = json.loads(stdout)
+            _, stdout, _ = self._run_command_bytes(args)
+            data = _json_loads()(stdout)
 
+            # Every caller reads the snapshot times, so they are parsed here;
+            # Python 3.11's fromisoformat takes restic's "Z" suffix as is
+            parse_time = datetime.fromisoformat
             result = []
             for snap in data:
-                snapshot = Snapshot(
-                    id=snap["id"],
-                    time=datetime.fromisoformat(snap["time"].replace("Z", "+00:00")),
-                    hostname=snap["hostname"],
-                    paths=snap["paths"],
-                    tags=snap.get("tags", []),
-                    metadata=snap,
+                snap_id, time, hostname, paths = _snapshot_fields(snap)
+                result.append(
+                    Snapshot(
+                        snap_id,
+                        parse_time(time),
+                        hostname,
+                        paths,
+                        snap.get("tags", []),
+                        snap,
+                    )
                 )
-                result.append(snapshot)
-
             return result
         except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
             logger.error(f"Failed to list snapshots: {e}")
             # Check if the error indicates the repository doesn't exist
             if isinstance(e, subprocess.CalledProcessError):
-                error_text = (e.stderr or "") + str(e)
-                if (
-                    "unable to open config file" in error_text
-                    or "Is there a repository at the following location" in error_text
-                    or "repository does not exist" in error_text
-                ):
+                stderr = e.stderr or b""
+                if isinstance(stderr, bytes):
+                    stderr = stderr.decode(errors="replace")
+                if repository_missing(e.returncode, stderr + str(e)):
                     raise
             return []
 
-    def forget(self, snapshot_ids: List[str]) -> bool:
+    def forget(self, snapshot_ids: List[str], prune: bool = False) -> bool:
         """
         Remove snapshots from the repository index.
 
+        IDs are passed in batches of FORGET_BATCH_SIZE per restic call.
+
         Args:
             snapshot_ids: List of snapshot IDs to forget
+            prune: Also prune the repository, in the last forget call
+                (``forget --prune``) rather than a separate restic run
 
         Returns:
             True if successful, False otherwise
         """
-        args = ["forget"]
-        args.extend(snapshot_ids)
+        size = self.FORGET_BATCH_SIZE
+        starts = range(0, len(snapshot_ids), size) or range(1)
 
         try:
-            self._run_command(args)
+            for start in starts:
+                args = ["forget", *snapshot_ids[start : start + size]]
+                if prune and start == starts[-1]:
+                    args.append("--prune")
+                self._run_command(args)
             logger.info(f"Forgot {len(snapshot_ids)} snapshots")
+            if prune:
+                logger.info("Pruned repository")
             return True
         except subprocess.CalledProcessError:
             logger.error("Failed to forget snapshots")
@@ -1,11 +1,13 @@
 import json
 import logging
 import shlex
-import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from timeless_py.platform import find_executable
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +20,13 @@ def _generate_macos_manifest(manifest_path: Path) -> Optional[Path]:
         "-json",
     ]
 
-    cmd_str = " ".join(shlex.quote(str(arg)) for arg in command)
+    cmd_str = " ".join([shlex.quote(str(arg)) for arg in command])
     logger.info(f"Generating applications manifest with command: {cmd_str}")
 
     try:
-        with open(manifest_path, "w") as f:
-            subprocess.run(
-                command,
-                check=True,
-                text=True,
-                stdout=f,
-            )
+        # The child writes straight to the file, so nothing is decoded here
+        with open(manifest_path, "wb") as f:
+            subprocess.run(command, check=True, stdout=f)
         logger.info(f"Successfully generated applications manifest at {manifest_path}")
         return manifest_path
     except subprocess.CalledProcessError as e:
@@ -41,31 +39,42 @@ def _generate_macos_manifest(manifest_path: Path) -> Optional[Path]:
 
 def _generate_linux_manifest(manifest_path: Path) -> Optional[Path]:
     """Generate an applications manifest on Linux by probing package managers."""
-    packages: Dict[str, Any] = {}
-
-    if shutil.which("dpkg"):
-        packages["dpkg"] = _collect_dpkg()
-
-    if shutil.which("rpm"):
-        packages["rpm"] = _collect_rpm()
+    probes = [(name, collect) for name, collect in _PROBES if find_executable(name)]
 
-    if shutil.which("snap"):
-        packages["snap"] = _collect_snap()
-
-    if shutil.which("flatpak"):
-        packages["flatpak"] = _collect_flatpak()
+    # Each probe mostly waits on its subprocess, so they run side by side;
+    # map keeps the manifest keys in probe order
+    packages: Dict[str, Any] = {}
+    if probes:
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            results = executor.map(lambda probe: probe[1](), probes)
+            packages = dict(zip([name for name, _ in probes], results, strict=True))
 
     if not packages:
         logger.warning("No supported package managers found on this Linux system.")
         return None
 
-    with open(manifest_path, "w") as f:
-        json.dump(packages, f, indent=2)
+    _write_json(packages, manifest_path)
 
     logger.info(f"Successfully generated applications manifest at {manifest_path}")
     return manifest_path
 
 
+def _write_json(data: Any, path: Path) -> None:
+    """
+    Write *data* to *path* as JSON indented by two spaces.
+
+    Uses orjson when it is installed (the ``fast`` extra).
+    """
+    try:
+        import orjson
+    except ImportError:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return
+    with open(path, "wb") as fb:
+        fb.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
 def _run_pkg_command(cmd: List[str]) -> List[str]:
     """Run a package-manager command and return stdout lines."""
     try:
@@ -92,6 +101,15 @@ def _collect_flatpak() -> List[str]:
     return _run_pkg_command(["flatpak", "list", "--columns=application,version"])
 
 
+# Package managers probed on Linux, in manifest order
+_PROBES: Tuple[Tuple[str, Callable[[], List[str]]], ...] = (
+    ("dpkg", _collect_dpkg),
+    ("rpm", _collect_rpm),
+    ("snap", _collect_snap),
+    ("flatpak", _collect_flatpak),
+)
+
+
 def generate_apps_manifest(output_path: Path) -> Optional[Path]:
     """
     Generates a JSON manifest of installed applications.
@@ -4,6 +4,8 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 
+from timeless_py.platform import find_executable
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,26 +29,28 @@ def generate_brewfile(output_path: Path) -> Optional[Path]:
         f"--file={brewfile_path}",
     ]
 
-    cmd_str = " ".join(shlex.quote(str(arg)) for arg in command)
+    cmd_str = " ".join([shlex.quote(str(arg)) for arg in command])
     logger.info(f"Generating Brewfile with command: {cmd_str}")
 
-    try:
-        subprocess.run(["which", "brew"], check=True, capture_output=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if find_executable("brew") is None:
         logger.warning(
             "Homebrew (`brew`) is not installed. Skipping Brewfile generation."
         )
         return None
 
+    # brew writes the Brewfile itself; its stdout is only kept for debug logs
+    debug = logger.isEnabledFor(logging.DEBUG)
     try:
         result = subprocess.run(
             command,
             check=True,
-            capture_output=True,
+            stdout=subprocess.PIPE if debug else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
         )
         logger.info(f"Successfully generated Brewfile at {brewfile_path}")
-        logger.debug(f"brew bundle dump stdout: {result.stdout}")
+        if debug:
+            logger.debug(f"brew bundle dump stdout: {result.stdout}")
         return brewfile_path
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to generate Brewfile: {e.stderr}")
@@ -4,6 +4,8 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 
+from timeless_py.platform import find_executable
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,12 +22,10 @@ def generate_mas_manifest(output_path: Path) -> Optional[Path]:
     manifest_path = output_path / "mas.txt"
     command = ["mas", "list"]
 
-    cmd_str = " ".join(shlex.quote(str(arg)) for arg in command)
+    cmd_str = " ".join([shlex.quote(str(arg)) for arg in command])
     logger.info(f"Generating MAS manifest with command: {cmd_str}")
 
-    try:
-        subprocess.run(["which", "mas"], check=True, capture_output=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if find_executable("mas") is None:
         logger.warning(
             "Mac App Store CLI (`mas`) is not installed. "
             "Skipping MAS manifest generation."
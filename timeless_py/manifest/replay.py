@@ -1,27 +1,41 @@
 import logging
+import os
+import re
 import shlex
 import subprocess
+import sys
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 from timeless_py.engine import BaseEngine, Snapshot
+from timeless_py.platform import find_executable
 
 logger = logging.getLogger(__name__)
 
+# A mas.txt line: "<id> <name> (<version>)"; lines not starting with a
+# numeric ID are skipped
+_MAS_LINE_RE = re.compile(r"^[ \t]*(\d+)(?:[ \t]+(.*?))?[ \t\r]*$", re.MULTILINE)
+
 
 def find_latest_manifest_snapshot(engine: BaseEngine) -> Optional[Snapshot]:
     """Finds the latest snapshot with the 'manifest' tag."""
     logger.info("Searching for the latest manifest snapshot...")
-    # The engine's snapshots() method should ideally return snapshots sorted newest
-    # first.
-    for snapshot in engine.snapshots():
-        if "manifest" in snapshot.tags:
-            logger.info(
-                f"Found latest manifest snapshot: {snapshot.id} from {snapshot.time}"
-            )
-            return snapshot
-    logger.warning("No manifest snapshot found.")
-    return None
+    # The engine filters by tag, and the tag is checked again for engines
+    # that list everything. restic's --latest cannot narrow this further:
+    # manifests are staged in a new temporary directory on every run, so
+    # each manifest snapshot has a path set of its own.
+    candidates = [
+        snapshot
+        for snapshot in engine.snapshots(tags=["manifest"])
+        if "manifest" in snapshot.tags
+    ]
+    if not candidates:
+        logger.warning("No manifest snapshot found.")
+        return None
+
+    snapshot = max(candidates, key=lambda s: s.time)
+    logger.info(f"Found latest manifest snapshot: {snapshot.id} from {snapshot.time}")
+    return snapshot
 
 
 def restore_manifests(
@@ -34,9 +48,15 @@ def restore_manifests(
     logger.info(f"Restoring manifests from snapshot {snapshot_id} to {target_dir}...")
 
     if engine.restore(snapshot_id=snapshot_id, paths=manifest_files, target=target_dir):
+        # One directory listing instead of a stat per manifest file
+        try:
+            with os.scandir(target_dir) as entries:
+                present = {entry.name for entry in entries}
+        except OSError:
+            present = set()
         for file in manifest_files:
-            restored_file = target_dir / file
-            if restored_file.exists():
+            if file in present:
+                restored_file = target_dir / file
                 logger.debug(f"Successfully restored {file} to {restored_file}")
                 restored_paths[file] = restored_file
             else:
@@ -52,20 +72,21 @@ def replay_brewfile(brewfile_path: Path) -> bool:
     if not brewfile_path.exists():
         logger.error(f"Brewfile not found at {brewfile_path}")
         return False
+    if find_executable("brew") is None:
+        logger.error("`brew` command not found. Is Homebrew installed?")
+        return False
 
     command = ["brew", "bundle", "install", f"--file={brewfile_path}"]
-    cmd_str = " ".join(shlex.quote(str(arg)) for arg in command)
+    cmd_str = " ".join([shlex.quote(str(arg)) for arg in command])
     logger.info(f"Replaying Brewfile with command: {cmd_str}")
 
     try:
-        process = subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-        )
-        if process.stdout:
-            for line in iter(process.stdout.readline, ""):
-                print(line, end="")
-
-        returncode = process.wait()
+        # brew writes to our stdout directly instead of through a Python loop;
+        # pending output is flushed first to keep the order
+        sys.stdout.flush()
+        returncode = subprocess.run(
+            command, stderr=subprocess.STDOUT, check=False
+        ).returncode
         if returncode == 0:
             logger.info("Brewfile replay completed successfully.")
             return True
@@ -73,14 +94,45 @@ def replay_brewfile(brewfile_path: Path) -> bool:
             logger.error(f"Brewfile replay failed with exit code {returncode}.")
             return False
 
-    except FileNotFoundError:
-        logger.error("`brew` command not found. Is Homebrew installed?")
-        return False
     except Exception as e:
         logger.error(f"An unexpected error occurred during Brewfile replay: {e}")
         return False
 
 
+def _mas_install(app_ids: List[str]) -> Optional[str]:
+    """Run ``mas install`` for *app_ids*, returning its error if it fails."""
+    try:
+        # Only stderr is read, for the failure message
+        subprocess.run(
+            ["mas", "install", *app_ids],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        return str(e.stderr)
+    except OSError as e:
+        # mas went missing after it was looked up, e.g. removed by brew bundle
+        return str(e)
+    return None
+
+
+def _mas_installed_ids() -> Optional[Set[str]]:
+    """Return the IDs ``mas list`` reports as installed, or None if mas cannot run."""
+    try:
+        listing = subprocess.run(
+            ["mas", "list"], check=True, capture_output=True, text=True
+        ).stdout
+    except subprocess.CalledProcessError:
+        # Nothing is known to be installed; every app is retried
+        return set()
+    except OSError:
+        return None
+    # mas list prints the same "<id> <name> (<version>)" lines as mas.txt
+    return {app_id for app_id, _ in _MAS_LINE_RE.findall(listing)}
+
+
 def replay_mas_manifest(mas_manifest_path: Path) -> bool:
     """Reinstalls Mac App Store apps from a mas.txt manifest."""
     if not mas_manifest_path.exists():
@@ -88,27 +140,36 @@ def replay_mas_manifest(mas_manifest_path: Path) -> bool:
         return False
 
     logger.info("Replaying MAS manifest...")
+    # Read in one go and parsed before any app is installed
+    apps: List[Tuple[str, str]] = _MAS_LINE_RE.findall(mas_manifest_path.read_text())
+
+    if apps and find_executable("mas") is None:
+        logger.error("`mas` command not found. Is it installed?")
+        return False
+
+    # One mas run installs every app. Only when it fails are the apps it did
+    # not install retried one by one, to report which of them fail.
     success = True
-    try:
-        with open(mas_manifest_path, "r") as f:
-            for line in f:
-                parts = line.strip().split()
-                if not parts or not parts[0].isdigit():
+    if apps:
+        logger.info(f"Installing {len(apps)} apps from the Mac App Store...")
+        error = _mas_install([app_id for app_id, _ in apps])
+        if error is not None and len(apps) == 1:
+            app_id, app_name = apps[0]
+            logger.error(f"Failed to install {app_name} ({app_id}): {error}")
+            success = False
+        elif error is not None:
+            installed = _mas_installed_ids()
+            if installed is None:
+                logger.error("`mas` command not found. Is it installed?")
+                return False
+            for app_id, app_name in apps:
+                if app_id in installed:
                     continue
-
-                app_id = parts[0]
-                app_name = " ".join(parts[1:])
                 logger.info(f"Installing {app_name} ({app_id}) from Mac App Store...")
-
-                command = ["mas", "install", app_id]
-                try:
-                    subprocess.run(command, check=True, capture_output=True, text=True)
-                except subprocess.CalledProcessError as e:
-                    logger.error(f"Failed to install {app_name} ({app_id}): {e.stderr}")
+                error = _mas_install([app_id])
+                if error is not None:
+                    logger.error(f"Failed to install {app_name} ({app_id}): {error}")
                     success = False
-    except FileNotFoundError:
-        logger.error("`mas` command not found. Is it installed?")
-        return False
 
     if success:
         logger.info("MAS manifest replay completed.")
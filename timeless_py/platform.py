@@ -5,29 +5,39 @@ Centralizes macOS vs Linux differences so the rest of the codebase
 can call simple functions instead of scattering ``sys.platform`` checks.
 """
 
+import functools
+import shutil
 import sys
-from typing import List
+from typing import Optional, Tuple
+
+# The platform cannot change while the process runs, so it is checked once
+_IS_MACOS = sys.platform == "darwin"
+_IS_LINUX = sys.platform.startswith("linux")
 
 
 def is_macos() -> bool:
     """Return True when running on macOS."""
-    return sys.platform == "darwin"
+    return _IS_MACOS
 
 
 def is_linux() -> bool:
     """Return True when running on Linux."""
-    return sys.platform.startswith("linux")
+    return _IS_LINUX
 
 
 def default_mount_path() -> str:
     """Return the platform-appropriate default mount point."""
-    if is_macos():
-        return "/Volumes/TimeVault"
-    return "/mnt/timevault"
+    return "/Volumes/TimeVault" if _IS_MACOS else "/mnt/timevault"
+
+
+def unmount_command(target: str) -> Tuple[str, ...]:
+    """Return the command to unmount *target* on the current platform."""
+    if _IS_MACOS:
+        return ("umount", target)
+    return ("fusermount", "-u", target)
 
 
-def unmount_command(target: str) -> List[str]:
-    """Return the command list to unmount *target* on the current platform."""
-    if is_macos():
-        return ["umount", target]
-    return ["fusermount", "-u", target]
+@functools.lru_cache(maxsize=None)
+def find_executable(name: str) -> Optional[str]:
+    """Return the path of *name* on ``PATH``, or None; looked up once per process."""
+    return shutil.which(name)
@@ -7,7 +7,6 @@ to determine which snapshots should be kept or pruned.
 
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List, Set, Tuple
 
@@ -17,6 +16,9 @@ from timeless_py.engine import Snapshot
 
 logger = logging.getLogger("timeless.retention")
 
+# Calendar fields identifying a time bucket, e.g. (year, month) for a month
+_TimeKey = Tuple[int, ...]
+
 
 class RetentionUnit(Enum):
     """Units for retention policy."""
@@ -75,8 +77,10 @@ class RetentionPolicy:
         Returns:
             RetentionPolicy instance
         """
+        # libyaml's C loader when PyYAML was built with it; same safe schema
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         try:
-            data = yaml.safe_load(yaml_str)
+            data = yaml.load(yaml_str, Loader=loader)
             return cls.from_dict(data)
         except yaml.YAMLError as e:
             logger.error(f"Failed to parse YAML: {e}")
@@ -127,7 +131,8 @@ class RetentionPolicy:
         Returns:
             YAML string representation of the policy
         """
-        return str(yaml.dump(self.to_dict(), default_flow_style=False))
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        return str(yaml.dump(self.to_dict(), Dumper=dumper, default_flow_style=False))
 
 
 class RetentionEvaluator:
@@ -142,176 +147,74 @@ class RetentionEvaluator:
         """
         self.policy = policy
 
-    def _group_snapshots_by_time(
+    def _select_snapshots(
         self, snapshots: List[Snapshot]
-    ) -> Dict[RetentionUnit, List[Tuple[datetime, Snapshot]]]:
+    ) -> Tuple[Set[str], List[str]]:
         """
-        Group snapshots by time unit (hourly, daily, weekly, monthly, yearly).
+        Split snapshots into those to keep and those to forget.
+
+        Walks the snapshots once, newest first. For each unit (hourly, daily,
+        weekly, monthly, yearly, in that order) a snapshot is kept when it is
+        the first one seen for its time bucket and the unit has not yet kept
+        its limit; a snapshot kept for one unit is not counted for the next.
+        Every other snapshot is forgotten, so the IDs to forget come out
+        newest first.
 
         Args:
-            snapshots: List of snapshots to group
+            snapshots: List of snapshots to evaluate
 
         Returns:
-            Dictionary mapping time units to lists of (time_key, snapshot) tuples
-        """
-        # Sort snapshots by time (newest first)
-        sorted_snaps = sorted(snapshots, key=lambda s: s.time, reverse=True)
-
-        # Group by time unit
-        grouped: Dict[RetentionUnit, List[Tuple[datetime, Snapshot]]] = {
-            RetentionUnit.HOURLY: [],
-            RetentionUnit.DAILY: [],
-            RetentionUnit.WEEKLY: [],
-            RetentionUnit.MONTHLY: [],
-            RetentionUnit.YEARLY: [],
-        }
-
-        for snap in sorted_snaps:
+            Tuple of (set of snapshot IDs to keep, list of IDs to forget)
+        """
+        policy = self.policy
+        limits = (
+            policy.hourly,
+            policy.daily,
+            policy.weekly,
+            policy.monthly,
+            policy.yearly,
+        )
+        # Time buckets seen per unit; only as many as the unit's limit are kept
+        seen: Tuple[Set[_TimeKey], ...] = tuple(set() for _ in limits)
+        open_units = sum(1 for limit in limits if limit > 0)
+        if not open_units:
+            # A policy keeping nothing needs no sort
+            return set(), [snap.id for snap in snapshots]
+
+        to_keep: Set[str] = set()
+        to_forget: List[str] = []
+        newest_first = iter(sorted(snapshots, key=lambda s: s.time, reverse=True))
+        for snap in newest_first:
+            # Calendar fields as integer tuples, which order like the times
+            # they stand for; the week is the ISO (year, week)
             time = snap.time
-
-            # Group by hour
-            hour_key = time.replace(minute=0, second=0, microsecond=0)
-            grouped[RetentionUnit.HOURLY].append((hour_key, snap))
-
-            # Group by day
-            day_key = time.replace(hour=0, minute=0, second=0, microsecond=0)
-            grouped[RetentionUnit.DAILY].append((day_key, snap))
-
-            # Group by week (use ISO week)
-            # Go to the beginning of the week (Monday)
-            week_start = time - timedelta(days=time.weekday())
-            week_key = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            grouped[RetentionUnit.WEEKLY].append((week_key, snap))
-
-            # Group by month
-            month_key = time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            grouped[RetentionUnit.MONTHLY].append((month_key, snap))
-
-            # Group by year
-            year_key = time.replace(
-                month=1, day=1, hour=0, minute=0, second=0, microsecond=0
+            year, month, day = time.year, time.month, time.day
+            keys = (
+                (year, month, day, time.hour),
+                (year, month, day),
+                time.isocalendar()[:2],
+                (year, month),
+                (year,),
             )
-            grouped[RetentionUnit.YEARLY].append((year_key, snap))
-
-        return grouped
 
-    def _select_snapshots_to_keep(
-        self,
-        grouped_snapshots: Dict[RetentionUnit, List[Tuple[datetime, Snapshot]]],
-    ) -> Set[str]:
-        """
-        Select snapshots to keep based on the retention policy.
-
-        Args:
-            grouped_snapshots: Dictionary mapping time units to lists of
-                (time_key, snapshot) tuples
-
-        Returns:
-            Set of snapshot IDs to keep
-        """
-        # For the test to pass, we need to ensure we're keeping exactly the number of
-        # snapshots specified in the policy for each category, even if there's overlap.
-        # This is a special implementation to match test expectations.
-
-        # Track snapshots by ID to avoid duplicates in the final set
-        to_keep = set()
-
-        # Track snapshots already processed to avoid counting in multiple categories
-        processed_ids = set()
-
-        # Process hourly snapshots
-        if self.policy.hourly > 0:
-            # Get unique hours and keep the newest snapshot for each hour
-            unique_hours = {}
-            for hour_key, snap in grouped_snapshots[RetentionUnit.HOURLY]:
-                if hour_key not in unique_hours:
-                    unique_hours[hour_key] = snap
-
-            # Keep the newest N hourly snapshots
-            hourly_kept = 0
-            for _, snap in sorted(
-                unique_hours.items(), key=lambda x: x[0], reverse=True
-            ):
-                if hourly_kept < self.policy.hourly:
-                    to_keep.add(snap.id)
-                    processed_ids.add(snap.id)
-                    hourly_kept += 1
-
-        # Process daily snapshots
-        if self.policy.daily > 0:
-            # Get unique days and keep the newest snapshot for each day
-            unique_days = {}
-            for day_key, snap in grouped_snapshots[RetentionUnit.DAILY]:
-                if day_key not in unique_days and snap.id not in processed_ids:
-                    unique_days[day_key] = snap
-
-            # Keep the newest N daily snapshots
-            daily_kept = 0
-            for _, snap in sorted(
-                unique_days.items(), key=lambda x: x[0], reverse=True
-            ):
-                if daily_kept < self.policy.daily:
+            for key, limit, unit_seen in zip(keys, limits, seen, strict=True):
+                if len(unit_seen) < limit and key not in unit_seen:
+                    unit_seen.add(key)
                     to_keep.add(snap.id)
-                    processed_ids.add(snap.id)
-                    daily_kept += 1
-
-        # Process weekly snapshots
-        if self.policy.weekly > 0:
-            # Get unique weeks and keep the newest snapshot for each week
-            unique_weeks = {}
-            for week_key, snap in grouped_snapshots[RetentionUnit.WEEKLY]:
-                if week_key not in unique_weeks and snap.id not in processed_ids:
-                    unique_weeks[week_key] = snap
-
-            # Keep the newest N weekly snapshots
-            weekly_kept = 0
-            for _, snap in sorted(
-                unique_weeks.items(), key=lambda x: x[0], reverse=True
-            ):
-                if weekly_kept < self.policy.weekly:
-                    to_keep.add(snap.id)
-                    processed_ids.add(snap.id)
-                    weekly_kept += 1
-
-        # Process monthly snapshots
-        if self.policy.monthly > 0:
-            # Get unique months and keep the newest snapshot for each month
-            unique_months = {}
-            for month_key, snap in grouped_snapshots[RetentionUnit.MONTHLY]:
-                if month_key not in unique_months and snap.id not in processed_ids:
-                    unique_months[month_key] = snap
-
-            # Keep the newest N monthly snapshots
-            monthly_kept = 0
-            for _, snap in sorted(
-                unique_months.items(), key=lambda x: x[0], reverse=True
-            ):
-                if monthly_kept < self.policy.monthly:
-                    to_keep.add(snap.id)
-                    processed_ids.add(snap.id)
-                    monthly_kept += 1
-
-        # Process yearly snapshots
-        if self.policy.yearly > 0:
-            # Get unique years and keep the newest snapshot for each year
-            unique_years = {}
-            for year_key, snap in grouped_snapshots[RetentionUnit.YEARLY]:
-                if year_key not in unique_years and snap.id not in processed_ids:
-                    unique_years[year_key] = snap
-
-            # Keep the newest N yearly snapshots
-            yearly_kept = 0
-            for _, snap in sorted(
-                unique_years.items(), key=lambda x: x[0], reverse=True
-            ):
-                if yearly_kept < self.policy.yearly:
-                    to_keep.add(snap.id)
-                    processed_ids.add(snap.id)
-                    yearly_kept += 1
+                    if len(unit_seen) == limit:
+                        open_units -= 1
+                    break
+            else:
+                to_forget.append(snap.id)
 
-        return to_keep
+            if not open_units:
+                # Every unit is full; whatever is older is forgotten
+                to_forget.extend(snap.id for snap in newest_first)
+                break
 
-    def evaluate(self, snapshots: List[Snapshot]) -> Tuple[List[str], List[str]]:
+        return to_keep, to_forget
+
+    def evaluate(self, snapshots: List[Snapshot]) -> Tuple[Set[str], List[str]]:
         """
         Evaluate the retention policy against a list of snapshots.
 
@@ -319,19 +222,13 @@ class RetentionEvaluator:
             snapshots: List of snapshots to evaluate
 
         Returns:
-            Tuple of (snapshot_ids_to_keep, snapshot_ids_to_forget)
+            Tuple of (snapshot_ids_to_keep, snapshot_ids_to_forget), the IDs to
+            forget ordered newest first
         """
         if not snapshots:
-            return [], []
-
-        # Group snapshots by time unit
-        grouped = self._group_snapshots_by_time(snapshots)
-
-        # Select snapshots to keep
-        to_keep = self._select_snapshots_to_keep(grouped)
+            return set(), []
 
-        # Determine which snapshots to forget
-        to_forget = [snap.id for snap in snapshots if snap.id not in to_keep]
+        to_keep, to_forget = self._select_snapshots(snapshots)
 
         # Log the results
         logger.info(
@@ -339,4 +236,4 @@ class RetentionEvaluator:
             f"forgetting {len(to_forget)}"
         )
 
-        return list(to_keep), to_forget
+        return to_keep, to_forget